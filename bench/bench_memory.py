@@ -0,0 +1,146 @@
+"""
+Benchmark de memoria del catálogo servido por /jobs, a tamaños grandes.
+
+Compara la representación anterior (lista de dicts de Job.to_dict() + json.dumps) con
+la actual (job_table.JobTable + JobTable.dumps), y los Job del scraper con y sin
+__slots__. Los avisos son sintéticos pero con la forma real (categorías, fuentes y
+ubicaciones repetidas, roles/empresas/links distintos); cada string se crea aparte,
+como cuando sale del parseo, para que el internado cuente.
+
+Mide con tracemalloc: memoria retenida por la estructura, pico durante la
+serialización y tiempo de serialización. Verifica además que ambos JSON sean iguales.
+
+Uso:
+    python bench/bench_memory.py [--sizes 10000,50000,100000] [--json salida.json]
+"""
+import argparse
+import dataclasses
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import scraper  # noqa: E402
+from job_table import JobTable  # noqa: E402
+
+CATEGORIAS = ["Planner", "Product Manager", "CPFR", "Category Manager", "Lead Manager",
+              "Mejora Continua", "Proyectos", "Customer", "Business Intelligence"]
+FUENTES = ["LABORUM", "CHILETRABAJOS", "GETONBRD", "INDEED", "EMPLEOSPÚBLICOS", "LINKEDIN", "OTRO"]
+UBICACIONES = ["Chile", "Santiago", "Chile/Remoto", "Valparaíso", "Concepción"]
+
+# El Job de antes: mismo dataclass, sin slots ni internado
+JobAntes = dataclasses.make_dataclass(
+    "JobAntes", [(f.name, f.type, f) for f in dataclasses.fields(scraper.Job)]
+)
+
+
+def _copia(s: str) -> str:
+    """Un str nuevo con el mismo contenido (lo que devuelve el parser para cada aviso)."""
+    return s.encode("utf-8").decode("utf-8")
+
+
+def avisos(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    for i in range(n):
+        horas = rnd.choice([None, rnd.randint(0, 120)])
+        yield scraper.Job(
+            category=_copia(rnd.choice(CATEGORIAS)),
+            role=f"{rnd.choice(CATEGORIAS)} Senior {i} – Área Comercial",
+            company=f"Empresa {rnd.randint(1, n // 3 + 1)} S.A.",
+            location=_copia(rnd.choice(UBICACIONES)),
+            source=_copia(rnd.choice(FUENTES)),
+            link=f"https://www.portal{rnd.randint(1, 9)}.cl/empleos/aviso-{i}-{rnd.getrandbits(32):08x}.html",
+            posted_raw=f"hace {horas} horas" if horas is not None else "",
+            posted_hours_ago=horas,
+            requirements=[f"Requisito del aviso {i}..."] if rnd.random() < 0.4 else [],
+        )
+
+
+def _dicts(n: int):
+    for i, j in enumerate(avisos(n), 1):
+        d = j.to_dict()
+        d["id"] = i
+        yield d
+
+
+def _medir(build):
+    """(objeto, bytes retenidos) de build()."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    retenido = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, retenido
+
+
+def _serializar(dumps):
+    gc.collect()
+    tracemalloc.start()
+    t = time.perf_counter()
+    body = dumps()
+    dt = time.perf_counter() - t
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return body, dt, pico
+
+
+def _mb(b: int) -> float:
+    return round(b / 2 ** 20, 2)
+
+
+def run(sizes) -> list:
+    out = []
+    for n in sizes:
+        # Job del scraper: sin slots vs con slots + internado
+        _, antes_jobs = _medir(lambda: [JobAntes(*dataclasses.astuple(j)) for j in avisos(n)])
+        _, ahora_jobs = _medir(lambda: list(avisos(n)))
+
+        # Catálogo servido: lista de dicts vs JobTable
+        dicts, antes_cat = _medir(lambda: list(_dicts(n)))
+        body_antes, t_antes, pico_antes = _serializar(
+            lambda: json.dumps(dicts, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        )
+        del dicts
+
+        table, ahora_cat = _medir(lambda: JobTable.from_dicts(_dicts(n)))
+        body_ahora, t_ahora, pico_ahora = _serializar(table.dumps)
+        del table
+
+        out.append({
+            "jobs": n,
+            "job_objects_mb": {"before": _mb(antes_jobs), "after": _mb(ahora_jobs)},
+            "catalog_mb": {"before": _mb(antes_cat), "after": _mb(ahora_cat)},
+            "serialize_peak_mb": {"before": _mb(pico_antes), "after": _mb(pico_ahora)},
+            "serialize_s": {"before": round(t_antes, 4), "after": round(t_ahora, 4)},
+            "body_mb": _mb(len(body_ahora)),
+            "same_output": body_antes == body_ahora,
+        })
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,50000,100000")
+    ap.add_argument("--json", help="escribe el resultado a este archivo")
+    args = ap.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "results": run([int(x) for x in args.sizes.split(",") if x]),
+    }
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark de near_dupes (MinHash + LSH) sobre avisos sintéticos.
+
+Genera N avisos (50k por defecto) de puestos/empresas variados; una fracción se
+vuelve a publicar en otros portales con variaciones típicas (mayúsculas, tildes,
+"(Santiago)", "- Remoto", "S.A." vs "SA", otro orden de palabras). Mide el tiempo
+de near_dupes.agrupar a varios tamaños (para ver que crece ~lineal) y la
+precisión/recall de los pares fusionados contra la verdad conocida. Para comparar,
+corre también la versión todos-contra-todos sobre una muestra chica.
+
+Uso:
+    python bench/bench_near_dupes.py [--n 50000] [--dup-rate 0.2] [--json salida.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import near_dupes  # noqa: E402
+
+Aviso = namedtuple("Aviso", "role company source posted_hours_ago link original")
+
+ROLES = ["Planner", "Product Manager", "Category Manager", "Analista", "Ingeniero", "Jefe", "Coordinador",
+         "Especialista", "Ejecutivo", "Supervisor", "Desarrollador", "Consultor", "Gerente", "Asistente"]
+AREAS = ["Demanda", "Abastecimiento", "Comercial", "Proyectos", "Mejora Continua", "Business Intelligence",
+         "Logística", "Operaciones", "Finanzas", "Marketing", "Customer Success", "CPFR", "Ventas", "Datos"]
+NIVELES = ["", "Senior", "Junior", "Semi Senior", "Sr.", "Trainee"]
+SUFIJOS = ["S.A.", "SpA", "Ltda.", "Chile", ""]
+FUENTES = ["LABORUM", "CHILETRABAJOS", "GETONBRD", "INDEED", "EMPLEOSPÚBLICOS", "COMPUTRABAJO"]
+
+
+def _variar(rnd: random.Random, role: str, company: str):
+    r = rnd.random()
+    if r < 0.25:
+        role = role.upper()
+    elif r < 0.5:
+        role = role + rnd.choice([" (Santiago)", " - Remoto", " – Híbrido"])
+    elif r < 0.65:
+        role = role.replace("í", "i").replace("é", "e").replace("ó", "o")
+    if rnd.random() < 0.3:
+        company = company.replace(" S.A.", " SA").replace(" SpA", "")
+    return role, company
+
+
+def generar(n: int, dup_rate: float, seed: int = 0):
+    rnd = random.Random(seed)
+    out = []
+    while len(out) < n:
+        i = len(out)
+        role = " ".join(x for x in (rnd.choice(ROLES), "de", rnd.choice(AREAS), rnd.choice(NIVELES)) if x)
+        company = f"Compañía {rnd.randint(1, n // 4 + 1)} {rnd.choice(SUFIJOS)}".strip()
+        source = rnd.choice(FUENTES)
+        out.append(Aviso(role, company, source, rnd.choice([None, rnd.randint(0, 96)]), f"https://x/{i}", i))
+        if rnd.random() < dup_rate:
+            for other in rnd.sample([f for f in FUENTES if f != source], rnd.randint(1, 3)):
+                r2, c2 = _variar(rnd, role, company)
+                out.append(Aviso(r2, c2, other, rnd.choice([None, rnd.randint(0, 96)]), f"https://y/{len(out)}", i))
+    return out[:n]
+
+
+def _pares(groups):
+    return {(a, b) for g in groups for a, b in itertools.combinations(sorted(g), 2)}
+
+
+def _verdad(jobs):
+    by = {}
+    for i, j in enumerate(jobs):
+        by.setdefault(j.original, []).append(i)
+    return _pares(by.values())
+
+
+def todos_contra_todos(jobs, threshold):
+    sh = [near_dupes.firma_tokens(j.role, j.company) if near_dupes.empresa_real(j.company) else set() for j in jobs]
+    uf = near_dupes._UnionFind(len(jobs))
+    for a, b in itertools.combinations(range(len(jobs)), 2):
+        if jobs[a].source != jobs[b].source and near_dupes.jaccard(sh[a], sh[b]) >= threshold:
+            uf.union(a, b)
+    groups = {}
+    for i in range(len(jobs)):
+        groups.setdefault(uf.find(i), []).append(i)
+    return list(groups.values())
+
+
+def run(n: int, dup_rate: float, threshold: float, pairwise_n: int = 2000) -> dict:
+    jobs = generar(n, dup_rate)
+    scaling = []
+    for size in sorted({n // 10, n // 4, n // 2, n}):
+        t = time.perf_counter()
+        near_dupes.agrupar(jobs[:size], threshold=threshold)
+        scaling.append({"jobs": size, "seconds": round(time.perf_counter() - t, 3)})
+
+    t = time.perf_counter()
+    groups = near_dupes.agrupar(jobs, threshold=threshold)
+    dt = time.perf_counter() - t
+    found, truth = _pares(groups), _verdad(jobs)
+    tp = len(found & truth)
+
+    sample = jobs[:pairwise_n]
+    t = time.perf_counter()
+    exact = todos_contra_todos(sample, threshold)
+    t_pairwise = time.perf_counter() - t
+    t = time.perf_counter()
+    lsh = near_dupes.agrupar(sample, threshold=threshold)
+    t_lsh = time.perf_counter() - t
+
+    return {
+        "jobs": n,
+        "threshold": threshold,
+        "seconds": round(dt, 3),
+        "jobs_per_s": round(n / dt, 1),
+        "groups": len(groups),
+        "merged": n - len(groups),
+        "precision": round(tp / len(found), 4) if found else None,
+        "recall": round(tp / len(truth), 4) if truth else None,
+        "scaling": scaling,
+        "pairwise_sample": {
+            "jobs": len(sample),
+            "pairwise_s": round(t_pairwise, 3),
+            "lsh_s": round(t_lsh, 3),
+            "lsh_recall_vs_pairwise": round(len(_pares(lsh) & _pares(exact)) / len(_pares(exact)), 4) if _pares(exact) else None,
+        },
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=50000)
+    ap.add_argument("--dup-rate", type=float, default=0.2)
+    ap.add_argument("--threshold", type=float, default=near_dupes.DEFAULT_THRESHOLD)
+    ap.add_argument("--json", help="escribe el resultado a este archivo")
+    args = ap.parse_args()
+
+    results = {"python": sys.version.split()[0], "results": run(args.n, args.dup_rate, args.threshold)}
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
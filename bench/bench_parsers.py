@@ -0,0 +1,110 @@
+"""
+Benchmark de parseo por portal sobre las páginas de bench/fixtures.
+
+Compara html.parser (lo que usábamos), lxml con árbol completo y lxml con el
+SoupStrainer de cada portal (parsing.STRAINERS); para la página genérica del aviso
+también selectolax si está instalado. Además verifica que cada backend extraiga
+exactamente lo mismo que html.parser.
+
+Las fixtures son páginas sintéticas con la estructura que esperan los selectores de
+scraper.py (más header/footer/CSS/JS para que el tamaño sea realista).
+
+Uso:
+    python bench/bench_parsers.py [--repeat 20] [--json salida.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import parsing  # noqa: E402
+import scraper  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "bench", "fixtures")
+
+# portal -> (fixture, extractor(soup))
+PORTALES = {
+    "google": ("google_serp.html", scraper.extraer_google),
+    "laborum": ("laborum.html", scraper.extraer_laborum),
+    "chiletrabajos": ("chiletrabajos.html", scraper.extraer_chiletrabajos),
+    "getonbrd": ("getonbrd.html", scraper.extraer_getonbrd),
+    "indeed": ("indeed_jsonld.html", lambda soup: scraper.extraer_indeed(soup, "a")),
+    "indeed_fallback": ("indeed_fallback.html", lambda soup: scraper.extraer_indeed(soup, "a")),
+    "empleos_publicos": ("empleospublicos.html", scraper.extraer_empleos_publicos),
+}
+
+
+def _backends():
+    out = [("html.parser", "html.parser", False)]
+    if parsing.DEFAULT_PARSER == "lxml":
+        out += [("lxml", "lxml", False), ("lxml+strainer", "lxml", True)]
+    out += [("html.parser+strainer", "html.parser", True)]
+    return out
+
+
+def _timeit(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples) * 1000
+
+
+def run(repeat: int = 20) -> dict:
+    results = {}
+
+    for portal, (fixture, extract) in PORTALES.items():
+        html = open(os.path.join(FIXTURES, fixture), encoding="utf-8").read()
+        strainer_key = "indeed" if portal.startswith("indeed") else portal
+        baseline = None
+        results[portal] = {"bytes": len(html.encode("utf-8"))}
+
+        for name, parser, partial in _backends():
+            def once():
+                return extract(parsing.make_soup(html, strainer_key, parser=parser, partial=partial))
+
+            out = repr(once())
+            if baseline is None:
+                baseline = out
+            results[portal][name] = {"ms": round(_timeit(once, repeat), 3), "same_output": out == baseline}
+
+    html = open(os.path.join(FIXTURES, "posting.html"), encoding="utf-8").read()
+    generic = {"bytes": len(html.encode("utf-8"))}
+    baseline = None
+    parsers = ["html.parser"] + (["lxml"] if parsing.DEFAULT_PARSER == "lxml" else [])
+    if parsing._SelectolaxParser is not None:
+        parsers.append("selectolax")
+    for parser in parsers:
+        def once():
+            return scraper.extraer_generico(html, parser=parser)
+
+        out = once()
+        baseline = out if baseline is None else baseline
+        generic[parser] = {"ms": round(_timeit(once, repeat), 3), "same_output": out == baseline}
+    results["generic"] = generic
+
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--json", help="escribe el resultado a este archivo")
+    args = ap.parse_args()
+
+    results = run(repeat=args.repeat)
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
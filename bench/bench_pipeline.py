@@ -0,0 +1,313 @@
+"""
+Benchmark offline del pipeline completo de scraper.obtener_empleos.
+
+Reproduce las páginas de bench/fixtures (Laborum, ChileTrabajos, GetOnBrd, Indeed
+JSON-LD y fallback, EmpleosPúblicos, SERP de Google y página de bloqueo, aviso
+genérico) a través de una sesión local que reemplaza a requests (y a httpx, si el
+enriquecimiento va por el fetch async), con fetchers sin delays ni sleeps. Mide por etapa (fetch, parse, extract, match, dedupe, serialize),
+memoria pico (tracemalloc) y avisos por segundo, con el catálogo a 1x, 10x y 100x
+(cada listado repite su contenido k veces con links distintos).
+
+Los tiempos por etapa son tiempo propio (sin contar etapas anidadas) sumado entre los
+hilos de DomainScheduler; "wall_s" es el tiempo real del refresh. Con ASYNC_FETCH, el
+fetch de los avisos suma el tiempo de cada corrutina (se solapan en el event loop).
+Por defecto se parsea en el mismo proceso (--parse-workers 0) para poder desglosar
+parse/extract; con --parse-workers N el parseo va a parsing.ParsePool y esas etapas
+quedan dentro de los workers (comparar wall_s y cpu_s).
+
+Uso:
+    python bench/bench_pipeline.py [--scales 1,10,100] [--scenarios normal,google_blocked,indeed_fallback]
+                                   [--repeat 1] [--parse-workers 0] [--json salida.json]
+"""
+import argparse
+import functools
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import parsing  # noqa: E402
+from parsing import ParsePool  # noqa: E402
+import scraper  # noqa: E402
+import server  # noqa: E402
+from enrich_cache import EnrichmentCache  # noqa: E402
+from job_table import JobTable  # noqa: E402
+from listing_cache import ListingCache  # noqa: E402
+from source_health import SourceBreakers, SourceSnapshots  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "bench", "fixtures")
+
+SCENARIOS = {
+    "normal": {"google": "google_serp.html", "indeed": "indeed_jsonld.html"},
+    "google_blocked": {"google": "google_blocked.html", "indeed": "indeed_jsonld.html"},
+    "indeed_fallback": {"google": "google_serp.html", "indeed": "indeed_fallback.html"},
+}
+
+
+def _fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def escalar(html: str, k: int) -> str:
+    """Repite el contenido del listado k veces; cada copia con links distintos (no colapsan en dedupe)."""
+    if k <= 1:
+        return html
+
+    m = re.search(r'(<main id="main">)(.*)(</main>)', html, re.S)
+    if m:
+        inner = m.group(2)
+        copies = [inner] + [re.sub(r'(href="(?!/url\?)[^"?#]*)', rf"\1-c{i}", inner) for i in range(1, k)]
+        html = html[:m.start(2)] + "".join(copies) + html[m.end(2):]
+
+    # JSON-LD de Indeed
+    return re.sub(
+        r'<script type="application/ld\+json">.*?</script>',
+        lambda s: "".join([s.group(0)] + [s.group(0).replace("jk=", f"jk=c{i}") for i in range(1, k)]),
+        html,
+        flags=re.S,
+    )
+
+
+class FixtureSession:
+    """Stand-in de requests.Session: responde desde las fixtures según host/path."""
+
+    def __init__(self, scenario: str, scale: int):
+        files = SCENARIOS[scenario]
+        self.pages = {
+            "google": _fixture(files["google"]),
+            "indeed": escalar(_fixture(files["indeed"]), scale),
+            "laborum": escalar(_fixture("laborum.html"), scale),
+            "chiletrabajos": escalar(_fixture("chiletrabajos.html"), scale),
+            "getonbrd": escalar(_fixture("getonbrd.html"), scale),
+            "empleospublicos": escalar(_fixture("empleospublicos.html"), scale),
+            "posting": _fixture("posting.html"),
+        }
+        self.requests = 0
+        self.bytes = 0
+
+    def _route(self, url: str) -> str:
+        u = urlparse(url)
+        host = u.netloc
+        if "google." in host:
+            return self.pages["google"]
+        if "indeed." in host and u.path == "/jobs":
+            return self.pages["indeed"]
+        if "laborum.cl" in host and "empleos-publicacion" in u.path:
+            return self.pages["laborum"]
+        if "chiletrabajos.cl" in host and u.path == "/encuentra-un-empleo":
+            return self.pages["chiletrabajos"]
+        if "getonbrd.com" in host and u.path == "/jobs":
+            return self.pages["getonbrd"]
+        if "empleospublicos.cl" in host and u.path.endswith("convocatorias.aspx"):
+            return self.pages["empleospublicos"]
+        return self.pages["posting"]
+
+    def _body(self, url: str) -> bytes:
+        body = self._route(url).encode("utf-8")
+        self.requests += 1
+        self.bytes += len(body)
+        return body
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        body = self._body(url)
+        r = requests.Response()
+        r.status_code = 200
+        r._content = body
+        r.url = url
+        r.encoding = "utf-8"
+        r.headers["Content-Type"] = "text/html; charset=utf-8"
+        return r
+
+    def async_client(self):
+        """Cliente httpx que responde desde las mismas fixtures (para AsyncPoliteFetcher)."""
+        def handler(request):
+            return scraper.httpx.Response(
+                200, content=self._body(str(request.url)), headers={"Content-Type": "text/html; charset=utf-8"}
+            )
+        return scraper.httpx.AsyncClient(transport=scraper.httpx.MockTransport(handler))
+
+
+class StageTimer:
+    """Tiempo propio por etapa: al entrar a una etapa anidada se pausa la de afuera."""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _add(self, stage: str, dt: float):
+        with self._lock:
+            self.totals[stage] += dt
+
+    def wrap(self, stage: str, fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            stack = self._local.__dict__.setdefault("stack", [])
+            now = time.perf_counter()
+            if stack:
+                self._add(stack[-1][0], now - stack[-1][1])
+            stack.append([stage, now])
+            with self._lock:
+                self.calls[stage] += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                st, started = stack.pop()
+                self._add(st, end - started)
+                if stack:
+                    stack[-1][1] = end
+        return inner
+
+    def wrap_async(self, stage: str, fn):
+        @functools.wraps(fn)
+        async def inner(*args, **kwargs):
+            with self._lock:
+                self.calls[stage] += 1
+            t = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self._add(stage, time.perf_counter() - t)
+        return inner
+
+
+STAGES = {
+    "parse": ["make_soup", "titulo_sitio_texto"],
+    "extract": ["extraer_google", "extraer_laborum", "extraer_chiletrabajos", "extraer_getonbrd",
+                "extraer_indeed", "extraer_empleos_publicos", "extraer_generico"],
+    "match": ["agrupar_por_categoria"],
+    "dedupe": ["Deduper.agregar"],
+}
+
+
+def _owner(name: str):
+    """("Deduper.agregar") -> (scraper.Deduper, "agregar"); nombres sin punto son del módulo."""
+    obj, _, attr = name.rpartition(".")
+    return (getattr(scraper, obj) if obj else scraper), attr
+
+
+def run_once(scenario: str, scale: int, trace_memory: bool = False, pool: ParsePool = None) -> dict:
+    timer = StageTimer()
+    fake = FixtureSession(scenario, scale)
+    tmp = tempfile.TemporaryDirectory()
+
+    saved = {name: getattr(*_owner(name)) for names in STAGES.values() for name in names}
+    saved.update({"session": scraper.session, "fetcher": scraper.fetcher, "enrich_cache": scraper.enrich_cache,
+                  "source_snapshots": scraper.source_snapshots, "breakers": scraper.breakers,
+                  "async_session": scraper.async_session, "async_fetcher": scraper.async_fetcher,
+                  "listing_cache": scraper.listing_cache, "parse_pool": scraper.parse_pool})
+    try:
+        scraper.session = fake
+        scraper.fetcher = scraper.PoliteFetcher(min_delay_by_domain={}, default_delay=0.0, sleep=lambda s: None)
+        scraper.fetcher.get = timer.wrap("fetch", scraper.fetcher.get)
+        if scraper.ASYNC_FETCH:
+            scraper.async_session = fake.async_client()
+            scraper.async_fetcher = scraper.AsyncPoliteFetcher(scraper.fetcher)
+            scraper.async_fetcher.get = timer.wrap_async("fetch", scraper.async_fetcher.get)
+        scraper.enrich_cache = EnrichmentCache(os.path.join(tmp.name, "enrich.sqlite"))
+        scraper.listing_cache = ListingCache()  # cada corrida parte en frío
+        # sin snapshots todas las unidades (fuente, categoría) se bajan, y sin breakers abiertos
+        scraper.source_snapshots = SourceSnapshots(os.path.join(tmp.name, "snapshots.sqlite"))
+        scraper.breakers = SourceBreakers()
+        scraper.parse_pool = pool or ParsePool(0)
+        for stage, names in STAGES.items():
+            for name in names:
+                setattr(*_owner(name), timer.wrap(stage, saved[name]))
+
+        if trace_memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        c0 = time.process_time()
+        jobs = scraper.obtener_empleos_reales()
+        t1 = time.perf_counter()
+        payload = server._build_payload(JobTable.from_dicts(jobs))
+        t2 = time.perf_counter()
+        cpu = time.process_time() - c0
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    finally:
+        for name, value in saved.items():
+            setattr(*_owner(name), value)
+        tmp.cleanup()
+
+    stages = {k: round(timer.totals.get(k, 0.0), 4) for k in ("fetch", "parse", "extract", "match", "dedupe")}
+    stages["serialize"] = round(t2 - t1, 4)
+    wall = t2 - t0
+    return {
+        "scenario": scenario,
+        "scale": scale,
+        "jobs": len(jobs),
+        "requests": fake.requests,
+        "bytes_in": fake.bytes,
+        "bytes_out": len(payload["identity"]),
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),  # sólo este proceso (no cuenta los workers de ParsePool)
+        "stages_s": stages,
+        "calls": dict(timer.calls),
+        "jobs_per_s": round(len(jobs) / wall, 1) if wall else None,
+        "peak_mem_mb": round(peak / 2 ** 20, 2) if peak is not None else None,
+    }
+
+
+def run(scales, scenarios, repeat: int = 1, parse_workers: int = 0) -> list:
+    out = []
+    pool = ParsePool(parse_workers)
+    try:
+        if parse_workers:
+            run_once(scenarios[0], 1, pool=pool)  # arranque de los workers fuera de la medición
+        for scenario in scenarios:
+            for scale in scales:
+                # tiempos sin tracemalloc (lo hace más lento); la memoria en una corrida aparte
+                runs = [run_once(scenario, scale, pool=pool) for _ in range(repeat)]
+                best = min(runs, key=lambda r: r["wall_s"])
+                best["peak_mem_mb"] = run_once(scenario, scale, trace_memory=True, pool=pool)["peak_mem_mb"]
+                out.append(best)
+    finally:
+        pool.shutdown()
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scales", default="1,10,100")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--parse-workers", type=int, default=0)
+    ap.add_argument("--json", help="escribe el resultado a este archivo")
+    args = ap.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "parser": parsing.PARSER,
+        "parse_workers": args.parse_workers,
+        "results": run(
+            [int(x) for x in args.scales.split(",") if x],
+            [x for x in args.scenarios.split(",") if x],
+            repeat=args.repeat,
+            parse_workers=args.parse_workers,
+        ),
+    }
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
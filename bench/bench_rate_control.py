@@ -0,0 +1,106 @@
+"""
+Simulación del delay por dominio: fijo (como antes) vs adaptativo (rate_control).
+
+Cada portal simulado acepta a lo más un request cada `capacidad` segundos (un token
+bucket del lado del servidor) y contesta 429 si se le pega antes. Con reloj virtual
+(no duerme de verdad) se corre una hora de requests contra cada portal y se cuenta
+cuántos salieron bien y cuántos 429 hubo, para:
+
+- fijo: delay inicial de siempre + backoff 4 s x 1.8 ante 429 (el PoliteFetcher anterior);
+- adaptativo: AdaptiveRate con los mismos delays iniciales y los pisos de scraper.fetcher.
+
+Uso:
+    python bench/bench_rate_control.py [--seconds 3600] [--json salida.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rate_control import AdaptiveRate  # noqa: E402
+
+# (dominio, delay inicial, piso, segundos entre requests que el portal tolera)
+PORTALES = [
+    ("rapido.cl", 10.0, 3.0, 2.0),     # aguanta más de lo que le pedíamos
+    ("normal.cl", 10.0, 3.0, 6.0),
+    ("estricto.cl", 10.0, 3.0, 14.0),  # el delay fijo se queda corto: 429 seguidos
+    ("google", 12.0, 12.0, 20.0),
+]
+
+
+class Portal:
+    def __init__(self, capacidad: float):
+        self.capacidad = capacidad
+        self.libre_desde = 0.0
+
+    def pedir(self, t: float) -> int:
+        if t < self.libre_desde:
+            self.libre_desde = t + self.capacidad  # pegarle antes de tiempo alarga el castigo
+            return 429
+        self.libre_desde = t + self.capacidad
+        return 200
+
+
+def fijo(portal: Portal, delay: float, segundos: float, rnd: random.Random) -> dict:
+    t, ok, n429 = 0.0, 0, 0
+    while t < segundos:
+        t += delay + rnd.uniform(0.3, 1.2)
+        backoff = 4.0
+        for _ in range(3):
+            if portal.pedir(t) == 200:
+                ok += 1
+                break
+            n429 += 1
+            t += backoff + rnd.uniform(0.5, 2.0)
+            backoff *= 1.8
+    return {"ok": ok, "429": n429}
+
+
+def adaptativo(portal: Portal, domain: str, delay: float, piso: float, segundos: float, rnd: random.Random) -> dict:
+    t = 0.0
+    rate = AdaptiveRate({domain: delay}, floor_by_domain={domain: piso}, max_delay=180.0, clock=lambda: t)
+    ok, n429 = 0, 0
+    while t < segundos:
+        t += rate.delay(domain) + rnd.uniform(0.3, 1.2)
+        for _ in range(3):
+            if portal.pedir(t) == 200:
+                ok += 1
+                rate.ok(domain, 0.5)
+                break
+            n429 += 1
+            t += rate.penalizar(domain) + rnd.uniform(0.5, 2.0)
+    return {"ok": ok, "429": n429, "final_delay": round(rate.delay(domain), 2)}
+
+
+def run(segundos: float) -> list:
+    out = []
+    for domain, delay, piso, capacidad in PORTALES:
+        out.append({
+            "domain": domain,
+            "tolerates_every_s": capacidad,
+            "fixed": fijo(Portal(capacidad), delay, segundos, random.Random(0)),
+            "adaptive": adaptativo(Portal(capacidad), domain, delay, piso, segundos, random.Random(0)),
+        })
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=3600.0)
+    ap.add_argument("--json", help="escribe el resultado a este archivo")
+    args = ap.parse_args()
+
+    results = {"python": sys.version.split()[0], "seconds": args.seconds, "results": run(args.seconds)}
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
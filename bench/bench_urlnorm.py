@@ -0,0 +1,206 @@
+"""
+urlnorm.canonical_url vs la canonical_url anterior (urlparse/parse_qs/urlencode en
+cada llamada): equivalencia + microbenchmark.
+
+1) Equivalencia: la salida (o la excepción) tiene que ser idéntica a la de la versión
+   anterior sobre los links de bench/fixtures y sobre URLs aleatorias armadas con lo que
+   rompe un normalizador (trackers en mayúsculas, parámetros repetidos o vacíos, /url?q=
+   de Google, fragmentos, ";", IPv6, espacios/tabs, no-ASCII, esquemas raros). Si hay una
+   sola diferencia el script termina con código 1.
+2) Tiempo por llamada sobre un corpus con la forma de un refresh (links de avisos sin
+   query + links con trackers, cada uno repetido varias veces): anterior, nueva con el
+   memo frío y nueva con el memo ya cargado (el refresh siguiente). Además url_key y lo
+   que pesa un set de claves de 64 bits vs uno de strings.
+
+Uso:
+    python bench/bench_urlnorm.py [--n 200000] [--fuzz 200000] [--seed 0] [--json salida.json]
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import urlnorm  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "bench", "fixtures")
+BASES = {
+    "laborum": "https://www.laborum.cl",
+    "chiletrabajos": "https://www.chiletrabajos.cl",
+    "getonbrd": "https://www.getonbrd.com",
+    "indeed_fallback": "https://cl.indeed.com",
+    "indeed_jsonld": "https://cl.indeed.com",
+    "empleospublicos": "https://www.empleospublicos.cl",
+    "google_serp": "https://www.google.com",
+    "posting": "https://www.laborum.cl",
+}
+
+
+def canonical_url_anterior(url: str) -> str:
+    """La canonical_url de scraper.py antes de urlnorm, tal cual."""
+    if not url:
+        return url
+
+    if "/url?q=" in url:
+        url = url.split("/url?q=")[1].split("&")[0]
+
+    parts = urlparse(url)
+    q = parse_qs(parts.query, keep_blank_values=False)
+
+    for k in list(q.keys()):
+        if k.lower() in {"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "gclid", "fbclid", "ref", "refsrc"}:
+            q.pop(k, None)
+
+    new_query = urlencode({k: v[0] for k, v in q.items()})
+    return parts._replace(query=new_query, fragment="").geturl()
+
+
+def links_fixtures() -> list:
+    out = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        base = BASES.get(name, "https://example.cl")
+        for href in re.findall(r'href="([^"]*)"', html):
+            out.append(urljoin(base, href.replace("&amp;", "&")))
+    return out
+
+
+ESQUEMAS = ["https://", "http://", "HTTPS://", "Http://", "//", "", "ftp://", "mailto:", "https:"]
+HOSTS = ["www.laborum.cl", "cl.indeed.com", "www.getonbrd.com", "[::1]", "[::1", "user:pw@host.cl:8080",
+         "empleos.cl", "ñandú.cl", "xn--and-6ma2c.cl", ""]
+SEGMENTOS = ["empleos", "job", "a b", "a%20b", "x;y", "x;", "ñ", "100%", "..", ".", "", "aviso-123.html",
+             "%E2%9C%93", "a+b", "~user", "é"]
+CLAVES = ["utm_source", "UTM_Source", "utm_medium", "utm_campaign", "gclid", "fbclid", "ref", "Ref", "refsrc",
+          "q", "id", "page", "jk", "from", "utm_content", "utm_term", "a b", "ñ", ""]
+VALORES = ["1", "", "a b", "a+b", "a%20b", "x=y", "ñ", "%", "%2", "&", "http://otro.cl/?z=1", "1;2"]
+RUIDO = [" ", "\t", "\n", "\r", "\x00", "\x7f", "#", "?", "&", ";", "[", "]"]
+
+
+def url_aleatoria(rnd: random.Random) -> str:
+    url = rnd.choice(ESQUEMAS) + rnd.choice(HOSTS)
+    url += "".join("/" + rnd.choice(SEGMENTOS) for _ in range(rnd.randint(0, 4)))
+    r = rnd.random()
+    if r < 0.6:
+        pares = [(rnd.choice(CLAVES), rnd.choice(VALORES)) for _ in range(rnd.randint(0, 5))]
+        url += "?" + "&".join(f"{k}={v}" if rnd.random() < 0.85 else k for k, v in pares)
+    elif r < 0.7:
+        url += "?"
+    if rnd.random() < 0.2:
+        url += "#" + rnd.choice(SEGMENTOS)
+    if rnd.random() < 0.1:
+        url = "https://www.google.com/url?q=" + url + "&sa=U&ved=" + rnd.choice(VALORES)
+    if rnd.random() < 0.1:
+        i = rnd.randint(0, len(url))
+        url = url[:i] + rnd.choice(RUIDO) + url[i:]
+    return url
+
+
+def resultado(fn, url):
+    try:
+        return ("ok", fn(url))
+    except Exception as e:  # la nueva tiene que fallar igual que la anterior
+        return ("error", type(e).__name__)
+
+
+def equivalencia(urls) -> dict:
+    urlnorm.cache_clear()
+    distintos = []
+    rapidas = 0
+    for u in urls:
+        if urlnorm._es_trivial(u):
+            rapidas += 1
+        a, b = resultado(canonical_url_anterior, u), resultado(urlnorm.canonical_url, u)
+        if a != b:
+            distintos.append({"url": u, "anterior": a, "nueva": b})
+    return {"urls": len(urls), "fast_path": rapidas, "mismatches": len(distintos), "examples": distintos[:5]}
+
+
+def corpus_refresh(n: int, rnd: random.Random) -> list:
+    """Links de avisos como los de un refresh: la mayoría sin query; ~1/4 con trackers o /url?q=."""
+    unicos = []
+    for i in range(max(1, n // 4)):
+        r = rnd.random()
+        if r < 0.75:
+            unicos.append(f"https://www.laborum.cl/empleos/aviso-{i}.html")
+        elif r < 0.9:
+            unicos.append(f"https://cl.indeed.com/viewjob?jk={i:x}&from=serp&utm_source=google&utm_medium=organic")
+        else:
+            unicos.append(f"https://www.google.com/url?q=https://www.getonbrd.com/jobs/{i}&sa=U&ved=0ah")
+    return [rnd.choice(unicos) for _ in range(n)]
+
+
+def por_llamada(fn, urls) -> float:
+    t = time.perf_counter()
+    for u in urls:
+        fn(u)
+    return (time.perf_counter() - t) / len(urls) * 1e9
+
+
+def tiempos(urls) -> dict:
+    anterior = por_llamada(canonical_url_anterior, urls)
+    urlnorm.cache_clear()
+    fria = por_llamada(urlnorm.canonical_url, urls)
+    caliente = por_llamada(urlnorm.canonical_url, urls)
+    info = urlnorm.canonical_url.cache_info()
+    canon = [urlnorm.canonical_url(u) for u in urls]
+    clave = por_llamada(urlnorm.url_key, canon)
+
+    unicos = set(canon)
+    claves = {urlnorm.url_key(u) for u in unicos}
+    bytes_str = sys.getsizeof(unicos) + sum(sys.getsizeof(u) for u in unicos)
+    bytes_key = sys.getsizeof(claves) + sum(sys.getsizeof(k) for k in claves)
+    return {
+        "calls": len(urls),
+        "unique": len(unicos),
+        "ns_per_call": {
+            "anterior": round(anterior, 1),
+            "urlnorm_cold": round(fria, 1),
+            "urlnorm_warm": round(caliente, 1),
+            "url_key": round(clave, 1),
+        },
+        "speedup_cold": round(anterior / fria, 2),
+        "speedup_warm": round(anterior / caliente, 2),
+        "memo": {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize},
+        "key_collisions": len(unicos) - len(claves),
+        "set_bytes": {"strings": bytes_str, "url_key": bytes_key},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200000, help="llamadas en el microbenchmark")
+    ap.add_argument("--fuzz", type=int, default=200000, help="URLs aleatorias para la equivalencia")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="escribe el resultado a este archivo")
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    fixtures = links_fixtures()
+    results = {
+        "python": sys.version.split()[0],
+        "equivalence": {
+            "fixtures": equivalencia(fixtures),
+            "fuzz": equivalencia([url_aleatoria(rnd) for _ in range(args.fuzz)]),
+        },
+        "timing": tiempos(corpus_refresh(args.n, rnd)),
+    }
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    if any(r["mismatches"] for r in results["equivalence"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Chequeos del cache de respuestas del fetch async (AsyncPoliteFetcher sobre un HttpCache
+en un directorio temporal), sin red: el cliente httpx corre sobre un MockTransport.
+
+- gzip: un aviso servido con Content-Encoding: gzip se pide dos veces; el segundo
+  (hit del cache) tiene que traer el mismo texto y no volver a descomprimirse.
+- ttl0: una URL con TTL 0 se pide dos veces a la red y el cache ni siquiera abre la
+  base (no se busca ni se guarda).
+
+Si algún chequeo falla el script termina con código 1.
+
+Uso:
+    python bench/check_fetch_cache.py
+"""
+import asyncio
+import gzip
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx  # noqa: E402
+
+import scraper  # noqa: E402
+from http_cache import HttpCache  # noqa: E402
+
+HTML = "<html><head><title>Aviso</title></head><body><h1>Analista ñandú</h1></body></html>"
+
+
+def cliente_gzip(llamadas: list) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        llamadas.append(str(request.url))
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "text/html; charset=utf-8", "Content-Encoding": "gzip"},
+            content=gzip.compress(HTML.encode("utf-8")),
+        )
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def pedir_dos_veces(cache: HttpCache, url: str):
+    llamadas: list = []
+    pacer = scraper.PoliteFetcher(min_delay_by_domain={}, default_delay=0.0, sleep=lambda s: None)
+    fetcher = scraper.AsyncPoliteFetcher(pacer, cache=cache)
+    async with cliente_gzip(llamadas) as client:
+        textos, from_cache = [], []
+        for _ in range(2):
+            r = await fetcher.get(session=client, url=url)
+            textos.append(r.text)
+            from_cache.append(getattr(r, "from_cache", False))
+    return textos, from_cache, llamadas
+
+
+async def chequear_gzip() -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HttpCache(os.path.join(tmp, "http_cache.sqlite"))
+        try:
+            textos, from_cache, llamadas = await pedir_dos_veces(cache, "https://www.laborum.cl/empleos/aviso-1.html")
+        except httpx.HTTPError as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    ok = textos == [HTML, HTML] and from_cache == [False, True] and len(llamadas) == 1
+    return {"ok": ok, "from_cache": from_cache, "requests": len(llamadas)}
+
+
+async def chequear_ttl0() -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "http_cache.sqlite")
+        cache = HttpCache(path, ttl_rules={"www.google.com/search": 0})
+        try:
+            textos, from_cache, llamadas = await pedir_dos_veces(cache, "https://www.google.com/search?q=analista")
+        except httpx.HTTPError as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        abierta = os.path.exists(path)
+    ok = textos == [HTML, HTML] and from_cache == [False, False] and len(llamadas) == 2 and not abierta
+    return {"ok": ok, "from_cache": from_cache, "requests": len(llamadas), "db_abierta": abierta}
+
+
+def main():
+    results = {"gzip_twice": asyncio.run(chequear_gzip()), "ttl0": asyncio.run(chequear_ttl0())}
+    for name, r in results.items():
+        print(name, r)
+    if not all(r["ok"] for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
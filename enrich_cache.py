@@ -0,0 +1,78 @@
+# enrich_cache.py
+import sqlite3
+import time
+from typing import Optional, Tuple
+
+from storage import LazySqlite
+
+# -------------------------
+# Cache durable del enriquecimiento de resultados de Google
+# -------------------------
+#
+# fetch_title_company_generic visita el aviso completo (delay de dominio + get_text de
+# todo el documento) para sacar (title, company, posted_raw). Los mismos avisos vuelven
+# en el SERP de varias categorías y de varios refreshes, así que guardamos el resultado
+# por canonical_url. Los fallos también se guardan (cache negativo) con un TTL más corto
+# para no reintentar en cada refresh un aviso caído o bloqueado.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS enrichment (
+    canonical_url TEXT PRIMARY KEY,
+    title         TEXT NOT NULL,
+    company       TEXT NOT NULL,
+    posted_raw    TEXT NOT NULL,
+    ok            INTEGER NOT NULL,  -- 0 = fallo (cache negativo)
+    fetched_at    REAL NOT NULL
+);
+"""
+
+
+class EnrichmentCache(LazySqlite):
+    SCHEMA = SCHEMA
+
+    def __init__(self, path: str = "enrich_cache.sqlite", ttl: float = 3 * 24 * 3600, negative_ttl: float = 6 * 3600):
+        super().__init__(path)
+        self.ttl = float(ttl)
+        self.negative_ttl = float(negative_ttl)
+
+    def _al_abrir(self, conn: sqlite3.Connection) -> None:
+        # de paso limpia lo vencido
+        now = time.time()
+        with conn:
+            conn.execute(
+                "DELETE FROM enrichment WHERE (ok = 1 AND fetched_at < ?) OR (ok = 0 AND fetched_at < ?)",
+                (now - self.ttl, now - self.negative_ttl),
+            )
+
+    def get(self, url: str, now: Optional[float] = None) -> Optional[Tuple[Tuple[str, str, str], float]]:
+        """
+        ((title, company, posted_raw), edad_en_segundos) si hay entrada vigente; None si hay que visitar.
+        Un fallo cacheado devuelve ("", "", "").
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._db().execute(
+                "SELECT title, company, posted_raw, ok, fetched_at FROM enrichment WHERE canonical_url = ?",
+                (url,),
+            ).fetchone()
+        if not row:
+            return None
+
+        title, company, posted_raw, ok, fetched_at = row
+        age = now - fetched_at
+        if age >= (self.ttl if ok else self.negative_ttl):
+            return None
+        return (title, company, posted_raw), age
+
+    def put(self, url: str, result: Tuple[str, str, str], now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        title, company, posted_raw = result
+        ok = 1 if (title or company or posted_raw) else 0
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO enrichment (canonical_url, title, company, posted_raw, ok, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, title, company, posted_raw, ok, now),
+                )
@@ -0,0 +1,242 @@
+# http_cache.py
+import json
+import sqlite3
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import metrics
+from storage import LazySqlite
+
+# -------------------------
+# Cache de respuestas HTTP de la sesión del scraper
+# -------------------------
+#
+# Reemplaza a requests_cache.install_cache, que parcheaba TODO requests del proceso al
+# importar scraper.py y guardaba en job_cache.sqlite, sin tope, el body completo de cada
+# página visitada. Acá:
+#
+# - sólo pasan por el cache la sesión que monta CachingAdapter y AsyncPoliteFetcher (el
+#   fetch async de los avisos), los dos con la misma clave (cache_key);
+# - la base se abre al primer request (no al importar);
+# - tope en bytes con desalojo LRU (last_used) y TTL por dominio/prefijo de path (ver
+#   ttl_for). TTL 0 = no cacheable: ni se busca ni se guarda (ni se comprime);
+# - bodies comprimidos con zlib;
+# - mantenimiento periódico: borra lo vencido, desaloja hasta bajar del tope y
+#   devuelve las páginas libres al disco (auto_vacuum incremental).
+#
+# Sólo se guardan GET 200. Un request con "Cache-Control: no-store" no se busca ni se
+# guarda (bajar_listado revalida por su cuenta); con "no-cache" no se busca pero sí se
+# guarda la respuesta nueva.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key        TEXT PRIMARY KEY,  -- URL del request (con query)
+    status     INTEGER NOT NULL,
+    headers    TEXT NOT NULL,     -- JSON, sin Content-Encoding/Length (el body va decodificado)
+    body       BLOB NOT NULL,     -- zlib
+    size       INTEGER NOT NULL,  -- bytes que ocupa la fila (body comprimido + headers)
+    stored_at  REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at);
+"""
+
+# El body se guarda ya decodificado: estos headers describirían otro body
+_HEADERS_FUERA = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+def parse_ttls(spec: str) -> Dict[str, float]:
+    """"www.google.com/search=600,cl.indeed.com/jobs=600" -> {prefijo: segundos}. Ignora lo mal formado."""
+    out: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        prefijo, _, valor = part.partition("=")
+        try:
+            out[prefijo.strip().lower()] = float(valor)
+        except ValueError:
+            continue
+    return out
+
+
+class HttpCache(LazySqlite):
+    SCHEMA = SCHEMA
+
+    def __init__(
+        self,
+        path: str = "http_cache.sqlite",
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 24 * 3600,
+        ttl_rules: Optional[Dict[str, float]] = None,
+        maintenance_every: float = 600.0,
+        compress_level: int = 6,
+    ):
+        super().__init__(path)
+        self.max_bytes = int(max_bytes)
+        # una sola respuesta no puede llevarse más de 1/8 del cache
+        self.max_entry_bytes = max(1, self.max_bytes // 8)
+        self.default_ttl = float(default_ttl)
+        # prefijos "host[/path]" de más largo a más corto: gana el más específico
+        self.ttl_rules = sorted((ttl_rules or {}).items(), key=lambda kv: -len(kv[0]))
+        self.maintenance_every = float(maintenance_every)
+        self.compress_level = int(compress_level)
+        self._bytes = 0
+        self._next_maintenance = 0.0
+
+    def ttl_for(self, url: str) -> float:
+        parts = urlsplit(url)
+        target = parts.netloc.lower() + parts.path
+        for prefijo, ttl in self.ttl_rules:
+            if target.startswith(prefijo):
+                return ttl
+        return self.default_ttl
+
+    def _al_abrir(self, conn: sqlite3.Connection) -> None:
+        # auto_vacuum incremental: en una base que no lo tiene (nueva o vieja) se fija
+        # con un VACUUM completo, una sola vez. Después, el primer mantenimiento.
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        self._mantener(time.time())
+
+    def cacheable(self, url: str) -> bool:
+        """False si la URL tiene TTL 0: no vale la pena buscarla ni guardarla."""
+        return self.ttl_for(url) > 0
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """(status, headers, body) si hay entrada vigente; None si hay que ir a la red."""
+        now = time.time() if now is None else now
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT status, headers, body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if not row or row[3] <= now:
+                return None
+            with db:
+                db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        status, headers, body, _ = row
+        return status, json.loads(headers), zlib.decompress(body)
+
+    def put(self, key: str, status: int, headers, body: bytes, now: Optional[float] = None) -> bool:
+        """Guarda la respuesta con el TTL de su URL. False si no entra (TTL 0 o body demasiado grande)."""
+        now = time.time() if now is None else now
+        ttl = self.ttl_for(key)
+        if ttl <= 0:
+            return False
+        headers_json = json.dumps({k: v for k, v in headers.items() if k.lower() not in _HEADERS_FUERA})
+        blob = zlib.compress(body or b"", self.compress_level)
+        size = len(blob) + len(headers_json) + len(key)
+        if size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            db = self._db()
+            with db:
+                old = db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, status, headers, body, size, stored_at, expires_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, status, headers_json, blob, size, now, now + ttl, now),
+                )
+            self._bytes += size - (old[0] if old else 0)
+            if self._bytes > self.max_bytes or now >= self._next_maintenance:
+                self._mantener(now)
+        return True
+
+    def _mantener(self, now: float) -> None:
+        """Borra lo vencido, desaloja por LRU hasta el 90% del tope y libera páginas. Con el lock tomado."""
+        db = self._conn
+        with db:
+            vencidas = db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        if vencidas > 0:
+            metrics.HTTP_CACHE_EVICTIONS.inc(vencidas, reason="expired")
+        # se recalcula: otro proceso (workers del server) puede estar escribiendo la misma base
+        self._bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        if self._bytes > self.max_bytes:
+            objetivo = self._bytes - int(self.max_bytes * 0.9)
+            keys, liberado = [], 0
+            for key, size in db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                if liberado >= objetivo:
+                    break
+                keys.append((key,))
+                liberado += size
+            with db:
+                db.executemany("DELETE FROM responses WHERE key = ?", keys)
+            self._bytes -= liberado
+            metrics.HTTP_CACHE_EVICTIONS.inc(len(keys), reason="lru")
+
+        # execute() avanza el pragma un solo paso (= una página); executescript lo corre entero
+        db.executescript("PRAGMA incremental_vacuum;")
+        db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._next_maintenance = now + self.maintenance_every
+
+    def size_bytes(self) -> int:
+        """Bytes en uso (0 si la base todavía no se abrió)."""
+        return self._bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute("DELETE FROM responses")
+            self._bytes = 0
+            db.execute("VACUUM")
+
+
+def cache_key(url: str, params=None) -> str:
+    """La URL como la arma requests (query incluida): la clave de la sesión síncrona y del fetch async."""
+    return requests.Request("GET", url, params=params).prepare().url
+
+
+def _directivas(request: requests.PreparedRequest) -> str:
+    return (request.headers.get("Cache-Control") or "").lower()
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter que contesta GETs desde un HttpCache. Se monta sólo en la sesión del
+    scraper (session.mount), así ningún otro requests del proceso pasa por el cache.
+    Las respuestas del cache llevan from_cache = True, como las de requests_cache.
+    """
+
+    def __init__(self, cache: HttpCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        directivas = _directivas(request)
+        usable = request.method == "GET" and "no-store" not in directivas and self.cache.cacheable(request.url)
+
+        if usable and "no-cache" not in directivas:
+            hit = self.cache.get(request.url)
+            if hit is not None:
+                return self._respuesta(request, *hit)
+
+        resp = super().send(request, **kwargs)
+        if usable and resp.status_code == 200:
+            # lee el body acá (con stream=True también): el cache lo necesita entero
+            self.cache.put(request.url, resp.status_code, resp.headers, resp.content)
+        resp.from_cache = False
+        return resp
+
+    def _respuesta(self, request: requests.PreparedRequest, status: int, headers: Dict[str, str], body: bytes) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = status
+        resp.reason = "OK" if status == 200 else ""
+        resp.headers = CaseInsensitiveDict(headers)
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = body
+        resp._content_consumed = True
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        resp.from_cache = True
+        return resp
@@ -0,0 +1,130 @@
+# job_index.py
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Sequence
+
+from job_table import JobTable
+
+# -------------------------
+# Índices en memoria sobre el snapshot de /jobs
+# -------------------------
+#
+# Se reconstruyen una vez por refresh (cuando _refresh_cache publica datos nuevos) y
+# después sólo se leen. Todas las posting lists guardan "rangos": la posición del aviso
+# en el orden por recencia (más nuevo primero, sin fecha al final). Como todas las listas
+# están ordenadas por rango, paginar es un slice y cortar por max_hours es un bisect.
+# Se leen las columnas del JobTable directamente; order[rango] da la fila.
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """minúsculas + sin tildes ("Gestión" -> "gestion")."""
+    t = unicodedata.normalize("NFKD", (texto or "").lower())
+    return "".join(ch for ch in t if not unicodedata.combining(ch))
+
+
+def tokens(texto: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(normalizar(texto))
+
+
+def _contiene(ranks: List[int], r: int) -> bool:
+    i = bisect_left(ranks, r)
+    return i < len(ranks) and ranks[i] == r
+
+
+class JobIndex:
+    def __init__(self, table: JobTable, version: str = "", catalog_version: Optional[int] = None):
+        self.version = version  # identifica el snapshot (los cursores no sirven entre snapshots)
+        self.catalog_version = catalog_version  # versión del JobStore de este snapshot (X-Catalog-Version)
+        self.table = table
+
+        # Orden por recencia estable: empates (y los sin fecha) mantienen el orden original
+        hours = [table.hours_at(i) for i in range(len(table))]
+        self.order: List[int] = sorted(range(len(table)), key=lambda i: (hours[i] is None, hours[i] or 0))
+
+        # horas por rango (sólo los que tienen fecha, que quedan al principio)
+        self._hours: List[int] = [hours[i] for i in self.order if hours[i] is not None]
+
+        self.by_category: Dict[str, List[int]] = {}
+        self.by_source: Dict[str, List[int]] = {}
+        self.by_token: Dict[str, List[int]] = {}
+
+        category, source = table.column("category"), table.column("source")
+        role, company = table.column("role"), table.column("company")
+        categories = table.categories
+        norm: Dict[str, str] = {}  # category/source están internados: normalizar una vez por valor
+        for rank, i in enumerate(self.order):
+            # ?category= calza con cualquiera de las categorías del aviso, no sólo la principal
+            pares = [(c, self.by_category) for c in dict.fromkeys((category[i],) + categories[i])]
+            pares.append((source[i], self.by_source))
+            for value, postings in pares:
+                key = norm.get(value)
+                if key is None:
+                    key = norm[value] = normalizar(value)
+                lst = postings.setdefault(key, [])
+                if not lst or lst[-1] != rank:
+                    lst.append(rank)
+            for tok in set(tokens(role[i]) + tokens(company[i])):
+                self.by_token.setdefault(tok, []).append(rank)
+
+        self._vocab: List[str] = sorted(self.by_token)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def dumps(self, ranks: Sequence[int]) -> bytes:
+        """JSON de los avisos en esos rangos, directo desde el JobTable."""
+        return self.table.dumps(self.order[r] for r in ranks)
+
+    def _prefix_postings(self, prefix: str) -> List[int]:
+        """Rangos de avisos con algún token que empiece con prefix ("plan" -> planner, planificación)."""
+        lo = bisect_left(self._vocab, prefix)
+        hi = bisect_left(self._vocab, prefix + "\uffff")
+        if hi - lo == 1:
+            return self.by_token[self._vocab[lo]]
+        ranks = set()
+        for tok in self._vocab[lo:hi]:
+            ranks.update(self.by_token[tok])
+        return sorted(ranks)
+
+    def search(
+        self,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        max_hours: Optional[int] = None,
+        q: Optional[str] = None,
+    ) -> Sequence[int]:
+        """
+        Devuelve los rangos (ordenados) que cumplen todos los filtros.
+        El costo depende de la posting list más corta, no del catálogo completo.
+        """
+        lists: List[List[int]] = []
+        if category:
+            lists.append(self.by_category.get(normalizar(category), []))
+        if source:
+            lists.append(self.by_source.get(normalizar(source), []))
+        for tok in tokens(q):
+            lists.append(self._prefix_postings(tok))
+
+        limit = len(self.order)
+        if max_hours is not None:
+            limit = bisect_right(self._hours, max_hours)
+
+        if not lists:
+            return range(limit)
+
+        lists.sort(key=len)
+        base = lists[0]
+        if len(lists) == 1:
+            return base[:bisect_left(base, limit)]
+
+        others = lists[1:]
+        return [r for r in base[:bisect_left(base, limit)] if all(_contiene(o, r) for o in others)]
+
+    def page(self, ranks: Sequence[int], after: Optional[int] = None, offset: int = 0, limit: Optional[int] = None) -> Sequence[int]:
+        """Slice de ranks: por cursor (rango del último aviso entregado) o por offset."""
+        start = bisect_right(ranks, after) if after is not None else offset
+        end = None if limit is None else start + limit
+        return ranks[start:end]
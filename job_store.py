@@ -0,0 +1,205 @@
+# job_store.py
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+from storage import LazySqlite
+from urlnorm import url_key
+
+# -------------------------
+# Store persistente de avisos (SQLite)
+# -------------------------
+#
+# Clave: canonical_url (el "link" que ya viene canonicalizado desde scraper.py).
+# Cada refresh hace upsert de lo que encontró: los avisos nuevos reciben un id estable
+# (AUTOINCREMENT, no se reutiliza), los que cambiaron se reescriben y los que siguen
+# igual sólo actualizan last_seen. Un aviso que no aparece en `expire_after` refreshes
+# seguidos se borra; mientras tanto se sigue sirviendo (un bloqueo puntual de Google
+# no vacía el catálogo).
+#
+# El n° de refresh es además la versión del catálogo: cada sync deja en job_changes lo
+# que agregó, cambió o borró (por canonical_url), y changes(since) junta esos deltas
+# para /jobs/changes. Se guardan los de los últimos `keep_changes` refreshes; un
+# cliente más atrasado que eso vuelve a bajar /jobs completo.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    canonical_url TEXT NOT NULL UNIQUE,
+    data          TEXT NOT NULL,     -- JSON del aviso (sin id)
+    hash          TEXT NOT NULL,     -- hash de data, para escribir sólo lo que cambió
+    first_seen    REAL NOT NULL,
+    last_seen     REAL NOT NULL,
+    last_refresh  INTEGER NOT NULL,  -- n° de refresh en que se vio por última vez
+    position      INTEGER NOT NULL   -- orden dentro de ese refresh
+);
+CREATE TABLE IF NOT EXISTS job_changes (
+    version       INTEGER NOT NULL,  -- refresh_no en que pasó
+    canonical_url TEXT NOT NULL,
+    op            TEXT NOT NULL,     -- added / changed / removed
+    id            INTEGER NOT NULL,
+    data          TEXT               -- JSON del aviso (sin id); NULL si op = removed
+);
+CREATE INDEX IF NOT EXISTS job_changes_version ON job_changes (version);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def job_key(job: Dict) -> str:
+    return job.get("link") or f'{job.get("source", "")}|{job.get("role", "")}|{job.get("company", "")}'
+
+
+class JobStore(LazySqlite):
+    SCHEMA = SCHEMA
+
+    def __init__(self, path: str = "jobs.sqlite", expire_after: int = 3, keep_changes: int = 48):
+        super().__init__(path)
+        self.expire_after = int(expire_after)
+        self.keep_changes = int(keep_changes)
+
+    def _meta(self, key: str, default: str = "") -> str:
+        row = self._db().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value) -> None:
+        self._db().execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def sync(self, jobs: List[Dict], now: Optional[float] = None) -> List[Dict]:
+        """
+        Upsert del resultado de un refresh. Devuelve el catálogo vigente con ids estables:
+        primero lo visto en este refresh (en su orden), después lo que aún no expira.
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            db = self._db()
+            with db:
+                refresh_no = int(self._meta("refresh_no", "0")) + 1
+                if not self._meta("changes_from"):
+                    # store de antes del log de cambios: hay deltas desde la versión actual
+                    self._set_meta("changes_from", refresh_no - 1)
+                # en memoria por url_key (64 bits), no por el string de la URL
+                existing = {url_key(url): h for url, h in db.execute("SELECT canonical_url, hash FROM jobs")}
+
+                inserts, updates, touches = [], [], []
+                seen = set()
+                for pos, job in enumerate(jobs):
+                    key = job_key(job)
+                    hkey = url_key(key)
+                    if hkey in seen:
+                        continue
+                    seen.add(hkey)
+
+                    data = json.dumps(
+                        {k: v for k, v in job.items() if k != "id"},
+                        ensure_ascii=False, separators=(",", ":")
+                    )
+                    h = hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+                    if hkey not in existing:
+                        inserts.append((key, data, h, now, now, refresh_no, pos))
+                    elif existing[hkey] != h:
+                        updates.append((data, h, now, refresh_no, pos, key))
+                    else:
+                        touches.append((now, refresh_no, pos, key))
+
+                db.executemany(
+                    "INSERT INTO jobs (canonical_url, data, hash, first_seen, last_seen, last_refresh, position) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    inserts,
+                )
+                db.executemany(
+                    "UPDATE jobs SET data = ?, hash = ?, last_seen = ?, last_refresh = ?, position = ? "
+                    "WHERE canonical_url = ?",
+                    updates,
+                )
+                db.executemany(
+                    "UPDATE jobs SET last_seen = ?, last_refresh = ?, position = ? WHERE canonical_url = ?",
+                    touches,
+                )
+                expired = db.execute(
+                    "SELECT id, canonical_url FROM jobs WHERE last_refresh <= ?", (refresh_no - self.expire_after,)
+                ).fetchall()
+                db.execute("DELETE FROM jobs WHERE last_refresh <= ?", (refresh_no - self.expire_after,))
+
+                ids = dict(db.execute("SELECT canonical_url, id FROM jobs WHERE last_refresh = ?", (refresh_no,)))
+                changes = [(refresh_no, row[0], "added", ids[row[0]], row[1]) for row in inserts]
+                changes += [(refresh_no, row[5], "changed", ids[row[5]], row[0]) for row in updates]
+                changes += [(refresh_no, url, "removed", job_id, None) for job_id, url in expired]
+                db.executemany(
+                    "INSERT INTO job_changes (version, canonical_url, op, id, data) VALUES (?, ?, ?, ?, ?)", changes
+                )
+                changes_from = max(int(self._meta("changes_from", "0")), refresh_no - self.keep_changes)
+                db.execute("DELETE FROM job_changes WHERE version <= ?", (changes_from,))
+
+                self._set_meta("changes_from", changes_from)
+                self._set_meta("refresh_no", refresh_no)
+                self._set_meta("refreshed_at", now)
+
+            return self._load()
+
+    def load(self) -> Tuple[List[Dict], float]:
+        """Catálogo vigente + timestamp del último refresh (0.0 si el store está vacío)."""
+        with self._lock:
+            return self._load(), float(self._meta("refreshed_at", "0"))
+
+    def version(self) -> int:
+        """Versión del catálogo: n° del último refresh sincronizado (0 si nunca hubo)."""
+        with self._lock:
+            return int(self._meta("refresh_no", "0"))
+
+    def changes(self, since: int, until: Optional[int] = None) -> Optional[Dict]:
+        """
+        Lo que cambió entre la versión `since` y `until` (por defecto la actual), ya
+        compactado por aviso: agregado y después cambiado sale como "added" con sus datos
+        finales; agregado y borrado en el intervalo no sale. Los avisos van con id, igual
+        que en /jobs; los borrados sólo con id y link. None si `since` es más viejo que
+        los deltas guardados (o más nuevo que la versión actual): toca bajar todo.
+        """
+        with self._lock:
+            db = self._db()
+            current = int(self._meta("refresh_no", "0"))
+            until = current if until is None else min(int(until), current)
+            if since > until or since < int(self._meta("changes_from", "0")):
+                return None
+            rows = db.execute(
+                "SELECT canonical_url, op, id, data FROM job_changes "
+                "WHERE version > ? AND version <= ? ORDER BY version, rowid",
+                (since, until),
+            ).fetchall()
+
+        net: Dict[str, List] = {}  # canonical_url -> [primera op, última op, id, data]
+        for url, op, job_id, data in rows:
+            item = net.get(url)
+            if item is None:
+                net[url] = [op, op, job_id, data]
+            else:
+                item[1:] = [op, job_id, data]
+
+        out = {"since": since, "version": until, "added": [], "changed": [], "removed": []}
+        for url, (first, last, job_id, data) in net.items():
+            if last == "removed":
+                if first != "added":
+                    out["removed"].append({"id": job_id, "link": url})
+                continue
+            d = json.loads(data)
+            d["id"] = job_id
+            out["added" if first == "added" else "changed"].append(d)
+        return out
+
+    def _load(self) -> List[Dict]:
+        out = []
+        for job_id, data in self._db().execute(
+            "SELECT id, data FROM jobs ORDER BY last_refresh DESC, position ASC"
+        ):
+            d = json.loads(data)
+            d["id"] = job_id
+            out.append(d)
+        return out
@@ -0,0 +1,139 @@
+# job_table.py
+import sys
+from array import array
+from json.encoder import encode_basestring  # versión en C si está disponible
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+# -------------------------
+# Snapshot de avisos en columnas
+# -------------------------
+#
+# El catálogo que sirve /jobs vive en memoria entre refreshes (CACHE_TTL_SECONDS, 15 min por
+# defecto) y, con varios workers, en cada uno.
+# Como lista de dicts, cada aviso es un dict de 10 claves + sus strings. Acá se guarda
+# una lista por campo (struct-of-arrays): category/source/location se internan (hay
+# pocas distintas), horas e ids van en arrays de C, y requirements/alt_links/categories en tuplas.
+# dumps() escribe el JSON directo desde las columnas, sin armar dicts intermedios, y el
+# resultado es byte a byte igual a json.dumps(ensure_ascii=False, separators=(",", ":"))
+# sobre la lista de dicts equivalente.
+
+# Los campos salen en el orden de Job.to_dict + "id" (ver row() y dumps())
+INTERNED = ("category", "source", "location")
+_STR_FIELDS = ("category", "role", "company", "location", "source", "posted_at", "link")
+
+_NO_HOURS = -1  # posted_hours_ago = None en el array
+
+
+class JobTable:
+    def __init__(self):
+        self._str: Dict[str, List[str]] = {f: [] for f in _STR_FIELDS}
+        self.hours = array("q")
+        self.ids = array("q")
+        self.requirements: List[tuple] = []
+        self.alt_links: List[tuple] = []
+        self.categories: List[tuple] = []
+
+    @classmethod
+    def from_dicts(cls, jobs: Iterable[Dict]) -> "JobTable":
+        table = cls()
+        for j in jobs:
+            table.append(j)
+        return table
+
+    def append(self, job: Dict) -> None:
+        for f in _STR_FIELDS:
+            v = job.get(f) or ""
+            self._str[f].append(sys.intern(v) if f in INTERNED else v)
+        hours = job.get("posted_hours_ago")
+        self.hours.append(_NO_HOURS if hours is None else int(hours))
+        self.ids.append(int(job.get("id") or 0))
+        self.requirements.append(tuple(job.get("requirements") or ()))
+        self.alt_links.append(tuple(job.get("alt_links") or ()))
+        self.categories.append(tuple(sys.intern(c) for c in job.get("categories") or ()))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def column(self, field: str) -> Sequence:
+        """Columna de strings (category, role, company, ...). Sólo lectura."""
+        return self._str[field]
+
+    def hours_at(self, i: int) -> Optional[int]:
+        h = self.hours[i]
+        return None if h == _NO_HOURS else h
+
+    def row(self, i: int) -> Dict:
+        """Un aviso como dict (para código que lo necesite; /jobs no pasa por acá)."""
+        s = self._str
+        return {
+            "category": s["category"][i],
+            "role": s["role"][i],
+            "company": s["company"][i],
+            "location": s["location"][i],
+            "source": s["source"][i],
+            "posted_at": s["posted_at"][i],
+            "posted_hours_ago": self.hours_at(i),
+            "link": s["link"][i],
+            "requirements": list(self.requirements[i]),
+            "alt_links": list(self.alt_links[i]),
+            "categories": list(self.categories[i]),
+            "id": self.ids[i],
+        }
+
+    def __iter__(self):
+        return (self.row(i) for i in range(len(self)))
+
+    def dumps(self, rows: Optional[Iterable[int]] = None) -> bytes:
+        """JSON (array) de las filas pedidas (todas por defecto), en ese orden."""
+        return b"".join(self.iter_dumps(rows))
+
+    def iter_dumps(self, rows: Optional[Iterable[int]] = None, chunk_rows: int = 1000, ndjson: bool = False) -> Iterator[bytes]:
+        """
+        El mismo JSON que dumps() pero por bloques de chunk_rows avisos, ya en UTF-8
+        (para respuestas en streaming). ndjson=True: un aviso por línea, sin corchetes.
+        """
+        s = self._str
+        category, role, company, location = s["category"], s["role"], s["company"], s["location"]
+        source, posted_at, link = s["source"], s["posted_at"], s["link"]
+        hours, ids, reqs, alts, cats = self.hours, self.ids, self.requirements, self.alt_links, self.categories
+        enc = encode_basestring
+        # los strings internados se repiten mucho: se escapan una sola vez
+        memo: Dict[str, str] = {}
+
+        def enc_memo(v: str) -> str:
+            e = memo.get(v)
+            if e is None:
+                e = memo[v] = enc(v)
+            return e
+
+        # se codifica a UTF-8 por bloques: nunca está el JSON entero como str y como bytes a la vez
+        sep = "\n" if ndjson else ","
+        first = True
+        parts: List[str] = []
+        for i in (range(len(self)) if rows is None else rows):
+            if len(parts) == chunk_rows:
+                yield self._bloque(parts, sep, first, ndjson)
+                first = False
+                parts = []
+            h = hours[i]
+            parts.append(
+                '{"category":%s,"role":%s,"company":%s,"location":%s,"source":%s,'
+                '"posted_at":%s,"posted_hours_ago":%s,"link":%s,"requirements":[%s],"alt_links":[%s],'
+                '"categories":[%s],"id":%d}' % (
+                    enc_memo(category[i]), enc(role[i]), enc(company[i]), enc_memo(location[i]),
+                    enc_memo(source[i]), enc(posted_at[i]), "null" if h == _NO_HOURS else h,
+                    enc(link[i]), ",".join(map(enc, reqs[i])), ",".join(map(enc, alts[i])),
+                    ",".join(map(enc_memo, cats[i])), ids[i],
+                )
+            )
+        if parts:
+            yield self._bloque(parts, sep, first, ndjson)
+            first = False
+        if not ndjson:
+            yield b"[]" if first else b"]"
+
+    @staticmethod
+    def _bloque(parts: List[str], sep: str, first: bool, ndjson: bool) -> bytes:
+        if ndjson:
+            return (sep.join(parts) + "\n").encode("utf-8")
+        return (("[" if first else ",") + sep.join(parts)).encode("utf-8")
@@ -0,0 +1,102 @@
+# keywords.py
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+# -------------------------
+# Matcher de categorías (keywords) en una sola pasada
+# -------------------------
+#
+# Cada anchor de cada listado se compara contra todas las categorías: es el loop más
+# caliente del refresh. KeywordMatcher junta todas las keywords en UNA regex compilada
+# (alternativas de la más larga a la más corta) y recorre el texto plegado una sola
+# vez: sale la lista completa de categorías que aparecen en el texto, sin importar
+# cuántas haya. Se compila una vez por lista de categorías (compilar() tiene caché).
+#
+# Mismo criterio que antes (la keyword como substring), pero sin distinguir mayúsculas
+# ni tildes: "Gestión de PROYECTOS" calza con "Proyectos" y con "gestion".
+
+DEFAULT_CATEGORIES = (
+    "Planner", "Product Manager", "CPFR", "Category Manager",
+    "Lead Manager", "Mejora Continua", "Proyectos", "Customer",
+    "Business Intelligence",
+)
+
+
+def plegar(texto: str) -> bytes:
+    """
+    minúsculas y sin tildes, en ASCII ("Gestión" -> b"gestion"). NFKD separa la tilde
+    de la letra y el encode la bota; lo que no tiene equivalente ASCII también se bota.
+    Todo en C: es lo que más pesa por texto.
+    """
+    t = texto.lower()
+    if t.isascii():
+        return t.encode("ascii")
+    return unicodedata.normalize("NFKD", t).encode("ascii", "ignore")
+
+
+def categorias_configuradas() -> List[str]:
+    """
+    Categorías del refresh: JOB_CATEGORIES (separadas por coma) o las de siempre. Se lee
+    en cada refresh: agregar una categoría no requiere tocar código.
+    """
+    raw = os.getenv("JOB_CATEGORIES", "")
+    cats = [c.strip() for c in raw.split(",") if c.strip()]
+    return list(dict.fromkeys(cats)) if cats else list(DEFAULT_CATEGORIES)
+
+
+class KeywordMatcher:
+    def __init__(self, categorias: Sequence[str]):
+        self.categorias: List[str] = list(dict.fromkeys(categorias))
+        self._orden: Dict[str, int] = {cat: i for i, cat in enumerate(self.categorias)}
+
+        por_keyword: Dict[bytes, List[str]] = {}
+        for cat in self.categorias:
+            kw = b" ".join(plegar(cat).split())
+            if kw:
+                por_keyword.setdefault(kw, []).append(cat)
+        keywords = sorted(por_keyword, key=len, reverse=True)
+
+        # La regex se queda con la keyword más larga que calza en cada posición; las que
+        # están contenidas en ella ("manager" en "product manager") también calzan ahí.
+        self._tags: Dict[bytes, FrozenSet[str]] = {
+            kw: frozenset(cat for k in keywords if k in kw for cat in por_keyword[k])
+            for kw in keywords
+        }
+        if not keywords:
+            self._re = None
+        elif _se_solapan(keywords):
+            # una keyword puede empezar dentro de otra: lookahead, se prueba en cada posición
+            self._re = re.compile(b"(?=(%s))" % b"|".join(map(re.escape, keywords)))
+        else:
+            self._re = re.compile(b"|".join(map(re.escape, keywords)))
+
+    def categorias_de(self, texto: str) -> List[str]:
+        """Todas las categorías cuya keyword aparece en texto, en el orden configurado."""
+        if self._re is None or not texto:
+            return []
+        found: set = set()
+        for kw in self._re.findall(plegar(texto)):
+            found |= self._tags[kw]
+        if len(found) > 1:
+            return sorted(found, key=self._orden.__getitem__)
+        return list(found)
+
+    def contiene(self, texto: str) -> bool:
+        return self._re is not None and bool(texto) and self._re.search(plegar(texto)) is not None
+
+
+def _se_solapan(keywords: Sequence[bytes]) -> bool:
+    """¿Puede una keyword empezar dentro de otra y terminar fuera? ("data lake" / "lake house")"""
+    for a in keywords:
+        for b in keywords:
+            if a is not b and any(a.endswith(b[:n]) for n in range(1, min(len(a), len(b)))):
+                return True
+    return False
+
+
+@lru_cache(maxsize=64)
+def compilar(categorias: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(categorias)
@@ -0,0 +1,73 @@
+# listing_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# -------------------------
+# Revalidación condicional de listados de portales
+# -------------------------
+#
+# Los listados (Laborum, ChileTrabajos, GetOnBrd, EmpleosPúblicos) son páginas grandes
+# que casi nunca cambian entre dos refreshes. Por URL guardamos los validadores
+# (ETag / Last-Modified), un hash del body y lo que ya se extrajo de esa página:
+#   - el portal responde 304  -> no se baja ni se parsea nada
+#   - responde 200 con el mismo body (portales sin validadores) -> no se parsea
+# Vive en memoria del proceso: al reiniciar, el primer refresh baja todo como siempre.
+
+
+class _Entrada:
+    __slots__ = ("etag", "last_modified", "digest", "value")
+
+    def __init__(self, etag: str, last_modified: str, digest: str, value: Any):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.value = value
+
+
+class ListingCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = int(max_entries)
+        self._items: "OrderedDict[Tuple[str, str], _Entrada]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(body: bytes) -> str:
+        return hashlib.sha1(body or b"").hexdigest()
+
+    def _get(self, key: Tuple[str, str]) -> Optional[_Entrada]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+            return entry
+
+    def validators(self, url: str, variant: str = "") -> Dict[str, str]:
+        """Headers condicionales para el próximo request de esta URL (vacío si no hay nada guardado)."""
+        entry = self._get((url, variant))
+        headers: Dict[str, str] = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def not_modified(self, url: str, variant: str = "") -> Optional[Any]:
+        """Lo extraído la última vez (para un 304)."""
+        entry = self._get((url, variant))
+        return entry.value if entry is not None else None
+
+    def same_body(self, url: str, digest: str, variant: str = "") -> Optional[Any]:
+        """Lo extraído la última vez si el body es idéntico; None si cambió o no hay entrada."""
+        entry = self._get((url, variant))
+        return entry.value if entry is not None and entry.digest == digest else None
+
+    def put(self, url: str, headers, digest: str, value: Any, variant: str = "") -> None:
+        entry = _Entrada(headers.get("ETag") or "", headers.get("Last-Modified") or "", digest, value)
+        with self._lock:
+            self._items[(url, variant)] = entry
+            self._items.move_to_end((url, variant))
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
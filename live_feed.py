@@ -0,0 +1,87 @@
+# live_feed.py
+import json
+import threading
+from typing import Dict, Iterator, List
+
+from job_store import job_key
+from urlnorm import url_key
+
+# -------------------------
+# Avisos de un refresh en curso, a medida que termina cada fuente
+# -------------------------
+#
+# El scraper llama publish(fuente, avisos) cuando cada portal/categoría termina (ver
+# `progreso` en scraper.obtener_empleos). /jobs?stream=1&live=1 sigue el feed con
+# follow(): entrega lo ya publicado y después espera lo que va llegando, hasta que el
+# refresh termina. Son avisos antes del store: sin "id" todavía, y deduplicados por la
+# misma clave que usa JobStore. Sólo existe en el worker que está scrapeando.
+
+
+class RefreshFeed:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._items: List[Dict] = []
+        self._seen = set()
+        self._generation = 0
+        self.active = False
+
+    def start(self) -> None:
+        with self._cond:
+            self._items = []
+            self._seen = set()
+            self._generation += 1
+            self.active = True
+            self._cond.notify_all()
+
+    def wait_active(self, timeout: float) -> bool:
+        """Espera hasta timeout a que haya un refresh en curso (p.ej. uno recién lanzado)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.active, timeout)
+
+    def publish(self, source: str, jobs: List[Dict]) -> None:
+        with self._cond:
+            for j in jobs:
+                key = url_key(job_key(j))
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                self._items.append(j)
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            self.active = False
+            self._cond.notify_all()
+
+    def follow(self, poll: float = 15.0) -> Iterator[List[Dict]]:
+        """Bloques de avisos nuevos hasta que el refresh termine (o empiece otro)."""
+        with self._cond:
+            generation = self._generation
+        sent = 0
+        while True:
+            with self._cond:
+                while self._generation == generation and self.active and sent >= len(self._items):
+                    self._cond.wait(poll)
+                if self._generation != generation:
+                    return
+                batch = self._items[sent:]
+                sent = len(self._items)
+                done = not self.active
+            if batch:
+                yield batch
+            if done:
+                return
+
+
+def iter_json(batches: Iterator[List[Dict]], ndjson: bool = False) -> Iterator[bytes]:
+    """Serializa los bloques de follow() como array JSON o NDJSON, igual que JobTable.iter_dumps."""
+    first = True
+    for batch in batches:
+        parts = [json.dumps(j, ensure_ascii=False, allow_nan=False, separators=(",", ":")) for j in batch]
+        if ndjson:
+            yield ("\n".join(parts) + "\n").encode("utf-8")
+        else:
+            yield (("[" if first else ",") + ",".join(parts)).encode("utf-8")
+        first = False
+    if not ndjson:
+        yield b"[]" if first else b"]"
@@ -0,0 +1,246 @@
+# metrics.py
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# -------------------------
+# Métricas en formato Prometheus (texto), sin dependencias
+# -------------------------
+#
+# Counter / Gauge / Histogram con labels, registrados en REGISTRY. server.py expone
+# REGISTRY.render() en /metrics. Es lo mínimo para ver qué portal se come el refresh
+# (latencias, sleeps de cortesía vs backoff, status, cache, parseo, avisos por fuente).
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: List[str] = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _labels(self, key: LabelKey, extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._labels(k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Valor puntual; con set_function se calcula al momento de render (tamaño del cache, edad...)."""
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._fn = fn
+
+    def samples(self) -> List[str]:
+        if self._fn is not None:
+            return [f"{self.name} {_fmt(self._fn())}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._labels(k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * len(self.buckets)
+                self._sums[key] = 0.0
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t, **labels)
+
+    def timed(self, **labels):
+        """Decorador: observa la duración de cada llamada."""
+        def deco(fn):
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                with self.time(**labels):
+                    return fn(*args, **kwargs)
+            return inner
+        return deco
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(c), self._sums[k]) for k, c in self._counts.items())
+        out = []
+        for key, counts, total in items:
+            acc = 0
+            for bound, c in zip(self.buckets, counts):
+                acc += c
+                le = 'le="%s"' % _fmt(bound)
+                out.append(f"{self.name}_bucket{self._labels(key, le)} {acc}")
+            out.append(f"{self.name}_sum{self._labels(key)} {_fmt(total)}")
+            out.append(f"{self.name}_count{self._labels(key)} {acc}")
+        return out
+
+
+# -------------------------
+# Métricas del scraper
+# -------------------------
+
+HTTP_SECONDS = Histogram(
+    "scraper_http_request_seconds", "Latencia de cada request HTTP (sin contar sleeps)", ["domain"]
+)
+HTTP_REQUESTS = Counter(
+    "scraper_http_requests_total", "Requests HTTP por dominio y status", ["domain", "status"]
+)
+HTTP_RETRIES = Counter(
+    "scraper_http_retries_total", "Reintentos por 429/5xx", ["domain"]
+)
+HTTP_CACHE = Counter(
+    "scraper_http_cache_total", "Respuestas servidas desde el cache HTTP (hit) o desde la red (miss)", ["domain", "result"]
+)
+HTTP_CACHE_EVICTIONS = Counter(
+    "scraper_http_cache_evictions_total", "Respuestas borradas del cache HTTP: expired (TTL) o lru (tope de tamaño)", ["reason"]
+)
+HTTP_CACHE_BYTES = Gauge(
+    "scraper_http_cache_bytes", "Bytes que ocupan las respuestas guardadas en el cache HTTP (bodies comprimidos)"
+)
+SLEEP_SECONDS = Counter(
+    "scraper_sleep_seconds_total", "Tiempo durmiendo: politeness (delay por dominio) o backoff (reintentos)", ["domain", "reason"]
+)
+RATE_DELAY = Gauge(
+    "scraper_rate_delay_seconds", "Delay adaptativo actual entre requests, por dominio", ["domain"]
+)
+RATE_PENALTIES = Counter(
+    "scraper_rate_penalties_total", "Veces que se endureció el delay de un dominio (429, 5xx, 403, blocked)", ["domain", "reason"]
+)
+SOURCE_FALLBACK = Counter(
+    "scraper_source_fallback_total",
+    "Unidades (fuente, categoría) servidas desde el último snapshot bueno: open (breaker), error o deadline",
+    ["source", "reason"],
+)
+SOURCE_UNITS = Counter(
+    "scraper_source_units_total",
+    "Unidades (fuente, categoría) por refresh: fetched (se bajó), fresh (snapshot dentro de su TTL) o fallback",
+    ["source", "result"],
+)
+PARSE_SECONDS = Histogram(
+    "scraper_parse_seconds", "Tiempo armando el árbol HTML por portal", ["portal"]
+)
+PARSE_POOL_SECONDS = Histogram(
+    "scraper_parse_pool_seconds", "Parseo + extracción dentro de un worker de ParsePool, por portal", ["portal"]
+)
+PARSE_POOL_RESTARTS = Counter(
+    "scraper_parse_pool_restarts_total", "Veces que se rearmó ParsePool porque murió un worker (OOM, segfault)"
+)
+SCRAPE_SECONDS = Histogram(
+    "scraper_source_seconds", "Duración de cada scraper (fetch + parse + extract)", ["source"]
+)
+JOBS_FOUND = Counter(
+    "scraper_jobs_total", "Avisos entregados por fuente antes del dedupe", ["source"]
+)
+DEDUPE_IN = Counter("scraper_dedupe_input_total", "Avisos que entran al dedupe")
+DEDUPE_DROPPED = Counter("scraper_dedupe_dropped_total", "Avisos descartados por duplicados")
+NEAR_DUPES_DROPPED = Counter(
+    "scraper_near_dupes_merged_total", "Avisos fusionados en otro por ser el mismo aviso en otro portal (alt_links)"
+)
+LISTING_CACHE = Counter(
+    "scraper_listing_cache_total",
+    "Listados por resultado de la revalidación: not_modified (304), unchanged (mismo body, sin parseo) o changed",
+    ["portal", "result"],
+)
+ENRICH_CACHE = Counter(
+    "scraper_enrich_cache_total", "Lookups del cache de enriquecimiento de Google", ["result"]
+)
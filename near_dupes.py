@@ -0,0 +1,126 @@
+# near_dupes.py
+import hashlib
+import struct
+from typing import Dict, List, Sequence, Set, Tuple
+
+from job_index import tokens
+
+# -------------------------
+# Casi-duplicados entre portales (mismo aviso, distinta URL)
+# -------------------------
+#
+# dedupe_jobs sólo junta URLs canónicas idénticas. Acá cada aviso se reduce al conjunto
+# de tokens normalizados de rol y empresa; MinHash + LSH (bandas) junta los candidatos
+# sin comparar todos contra todos, y cada candidato se confirma con el Jaccard exacto de
+# los conjuntos. Sólo se juntan avisos de fuentes distintas (dos avisos iguales en un
+# mismo portal suelen ser vacantes distintas) y sólo si ambos traen empresa real.
+# Tiempo ~lineal: cada aviso cae en BANDS buckets y se compara con a lo más un
+# representante por fuente en cada uno.
+
+NUM_PERM = 32
+BANDS = 8              # 8 bandas x 4 filas: candidatos desde Jaccard ~0.6
+ROWS = NUM_PERM // BANDS
+DEFAULT_THRESHOLD = 0.8
+
+# Las NUM_PERM "permutaciones" salen de un solo blake2b de 64 bytes por shingle, leído
+# como 32 enteros de 16 bits: todo en C y estable entre procesos (a diferencia de hash()).
+# 16 bits sobran: un choque sólo agrega un candidato, que igual se confirma con Jaccard.
+_UNPACK = struct.Struct("<%dH" % NUM_PERM).unpack
+
+# Empresa de relleno que ponen los extractores de scraper.py cuando el aviso no la trae.
+# Se usan desde acá para que PLACEHOLDER_COMPANIES no quede desfasada de los extractores.
+EMPRESA_GENERICA = "Empresa"
+EMPRESA_CONFIDENCIAL = "Confidencial"
+EMPRESA_VER_LINK = "(ver en link)"
+EMPRESA_SERVICIO_CIVIL = "Servicio Civil / Institución"
+
+# Empresas que en realidad no dicen nada: las de relleno de arriba, las que ponen los
+# propios portales y el nombre del portal (p.ej. el og:site_name de extraer_generico)
+PLACEHOLDER_COMPANIES = {
+    " ".join(tokens(c)) for c in (
+        "", EMPRESA_GENERICA, EMPRESA_CONFIDENCIAL, EMPRESA_VER_LINK, EMPRESA_SERVICIO_CIVIL,
+        "Empresa confidencial", "Google", "Laborum", "Indeed", "LinkedIn", "GetOnBrd",
+        "Get on Board", "ChileTrabajos", "Computrabajo", "Trabajando", "Empleos Públicos", "BNE",
+    )
+}
+_STOPWORDS = {"de", "del", "la", "el", "los", "las", "en", "y", "para", "con", "a", "e", "o", "s"}
+
+
+def firma_tokens(role: str, company: str) -> Set[str]:
+    """Shingles del aviso: tokens de rol y de empresa (por separado, para no mezclarlos)."""
+    out = {"r:" + t for t in tokens(role) if t not in _STOPWORDS}
+    out.update("c:" + t for t in tokens(company) if t not in _STOPWORDS)
+    return out
+
+
+def empresa_real(company: str) -> bool:
+    return " ".join(tokens(company)) not in PLACEHOLDER_COMPANIES
+
+
+def minhash(shingles: Set[str]) -> Tuple[int, ...]:
+    hs = [_UNPACK(hashlib.blake2b(s.encode("utf-8"), digest_size=2 * NUM_PERM).digest()) for s in shingles]
+    return tuple(map(min, *hs)) if len(hs) > 1 else hs[0]
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # la raíz queda en el índice menor: los grupos salen en orden de aparición
+            if rb < ra:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+
+def agrupar(jobs: Sequence, threshold: float = DEFAULT_THRESHOLD) -> List[List[int]]:
+    """
+    Grupos de índices de avisos casi duplicados (cada grupo ordenado, en orden de
+    aparición; los avisos sin duplicado vienen como grupos de uno). `jobs` necesita
+    role, company y source.
+    """
+    n = len(jobs)
+    uf = _UnionFind(n)
+    shingles: List[Set[str]] = [set()] * n
+    buckets: Dict[Tuple[int, Tuple[int, ...]], Dict[str, int]] = {}
+
+    for i, j in enumerate(jobs):
+        if not empresa_real(j.company):
+            continue
+        sh = shingles[i] = firma_tokens(j.role, j.company)
+        if not sh:
+            continue
+        sig = minhash(sh)
+        for band in range(BANDS):
+            # por bucket, un representante por fuente: el primer aviso de esa fuente
+            reps = buckets.setdefault((band, sig[band * ROWS:(band + 1) * ROWS]), {})
+            for source, k in reps.items():
+                if source != j.source and uf.find(k) != uf.find(i) and jaccard(sh, shingles[k]) >= threshold:
+                    uf.union(k, i)
+            reps.setdefault(j.source, i)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(uf.find(i), []).append(i)
+    return list(groups.values())
+
+
+def elegir_principal(jobs: Sequence, group: List[int]) -> int:
+    """El más completo: con fecha, antes en la lista (portales directos van primero)."""
+    return min(group, key=lambda i: (jobs[i].posted_hours_ago is None, i))
@@ -0,0 +1,198 @@
+# parsing.py
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import metrics
+
+# -------------------------
+# Capa de parseo HTML
+# -------------------------
+#
+# Todos los scrapers pasan por make_soup(). Por defecto usa lxml (bastante más rápido que
+# html.parser) y, si no está instalado, cae a html.parser. HTML_PARSER permite forzar uno.
+# Además, cada portal declara un SoupStrainer con sólo los nodos que sus selectores
+# usan: el árbol que se arma es mucho más chico y la API (select/find/get_text) es la
+# misma de siempre. Benchmark por portal: python bench/bench_parsers.py
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as _SelectolaxParser  # selectolax < 1.0
+    except ImportError:
+        _SelectolaxParser = None
+
+# HTML_PARSER=lxml|html.parser fuerza el backend de bs4; "selectolax" sólo aplica a la
+# página genérica (titulo_sitio_texto), los scrapers siguen con el default de bs4.
+_FORCED = os.getenv("HTML_PARSER", "")
+PARSER = _FORCED if _FORCED and _FORCED != "selectolax" else DEFAULT_PARSER
+GENERIC_PARSER = _FORCED or ("selectolax" if _SelectolaxParser is not None else DEFAULT_PARSER)
+
+# Parseo parcial por portal. None = árbol completo (el scraper navega hermanos o texto global).
+STRAINERS = {
+    "google": SoupStrainer("div", class_=["tF2Cxc", "g"]),
+    "laborum": SoupStrainer("a", href=re.compile(r"/empleos/")),
+    "chiletrabajos": None,  # usa h2 + hasta 3 hermanos siguientes: necesita el árbol tal cual
+    "getonbrd": SoupStrainer("a", href=re.compile(r"^/jobs/")),
+    "indeed": SoupStrainer(["script", "a"]),
+    "empleos_publicos": SoupStrainer("a", href=re.compile(r"convocatoria")),
+    "generic": None,
+}
+
+
+# Dentro de un worker de ParsePool el registry de métricas no es el que sirve /metrics:
+# los tiempos de armado se juntan acá y _en_worker los devuelve al proceso padre.
+_tiempos_worker: Optional[List[Tuple[str, float]]] = None
+
+
+def _observar_parseo(portal: str, seconds: float) -> None:
+    if _tiempos_worker is not None:
+        _tiempos_worker.append((portal, seconds))
+    else:
+        metrics.PARSE_SECONDS.observe(seconds, portal=portal)
+
+
+def make_soup(html: str, portal: Optional[str] = None, parser: Optional[str] = None, partial: bool = True) -> BeautifulSoup:
+    strainer = STRAINERS.get(portal) if (portal and partial) else None
+    t = time.perf_counter()
+    soup = BeautifulSoup(html or "", parser or PARSER, parse_only=strainer)
+    _observar_parseo(portal or "", time.perf_counter() - t)
+    return soup
+
+
+def titulo_sitio_texto(html: str, parser: Optional[str] = None) -> Tuple[str, str, str]:
+    """
+    Para la página genérica de un aviso: (texto del primer h1/h2, og:site_name, texto completo).
+    Aquí no sirve un strainer (se necesita el texto de todo el documento), así que si
+    selectolax está instalado lo usamos: arma el árbol y saca el texto en C.
+    """
+    parser = parser or GENERIC_PARSER
+    t = time.perf_counter()
+    result = _titulo_sitio_texto(html, parser)
+    _observar_parseo("generic", time.perf_counter() - t)
+    return result
+
+
+def _titulo_sitio_texto(html: str, parser: str) -> Tuple[str, str, str]:
+    if parser == "selectolax" and _SelectolaxParser is not None:
+        tree = _SelectolaxParser(html or "")
+        h = tree.css_first("h1, h2")
+        og = tree.css_first('meta[property="og:site_name"]')
+        # igual que get_text() de bs4: sin el contenido de <script>/<style>
+        tree.strip_tags(["script", "style", "template"])
+        root = tree.root
+        return (
+            h.text(separator=" ", strip=True) if h else "",
+            (og.attributes.get("content") or "") if og else "",
+            root.text(separator=" ", strip=True) if root else "",
+        )
+
+    soup = BeautifulSoup(html or "", PARSER if parser == "selectolax" else parser)
+    h = soup.find(["h1", "h2"])
+    og = soup.find("meta", attrs={"property": "og:site_name"})
+    return (
+        h.get_text(" ", strip=True) if h else "",
+        (og.get("content") or "") if og else "",
+        soup.get_text(" ", strip=True),
+    )
+
+
+# -------------------------
+# Pool de procesos para parseo + extracción
+# -------------------------
+#
+# bs4/lxml y get_text() son CPU puro y con el GIL no escalan con hilos. ParsePool manda
+# (función, html) a procesos worker, que devuelven lo ya extraído (Candidato/Job/tuplas,
+# nunca el soup). El número de tareas en vuelo está acotado: si los workers no dan
+# abasto, el hilo que bajó la página espera antes de encolar otra (backpressure).
+# workers=0 parsea en el mismo hilo, como antes.
+# Los workers viven sólo durante un refresh: se levantan con la primera página y
+# obtener_empleos los baja al terminar (shutdown). Así un worker de uvicorn que no tiene
+# el lease no se queda con procesos ociosos.
+# Si un worker muere (OOM, segfault de lxml) el executor queda roto para siempre: se
+# descarta, se arma otro y la página se reintenta una vez. No se parsea en el proceso
+# principal: si fue esa página la que mató al worker, mataría al server.
+
+
+def _en_worker(fn, args):
+    """fn(*args) + su duración + los tiempos de armado de árbol (PARSE_SECONDS) que hubo adentro."""
+    global _tiempos_worker
+    _tiempos_worker = []
+    try:
+        t = time.perf_counter()
+        result = fn(*args)
+        return result, time.perf_counter() - t, _tiempos_worker
+    finally:
+        _tiempos_worker = None
+
+
+class ParsePool:
+    def __init__(self, workers: int = 0, max_pending: Optional[int] = None):
+        self.workers = max(0, int(workers))
+        self.max_pending = max_pending or self.workers * 2
+        self._pending = threading.BoundedSemaphore(self.max_pending) if self.workers else None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._guard = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # spawn: hacer fork de un proceso con hilos (scheduler, event loop) no es seguro
+        with self._guard:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _descartar(self, executor: ProcessPoolExecutor) -> None:
+        # sólo si sigue siendo el actual: otro hilo puede haberlo reemplazado ya
+        with self._guard:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        metrics.PARSE_POOL_RESTARTS.inc()
+
+    def _submit(self, fn, args):
+        for intento in range(2):
+            executor = self._pool()
+            try:
+                return executor.submit(_en_worker, fn, args).result()
+            except BrokenProcessPool:
+                self._descartar(executor)
+                if intento:
+                    raise
+
+    def run(self, fn, *args, portal: str = ""):
+        """fn(*args) en un worker (fn y args deben ser picklables). Bloquea hasta tener el resultado."""
+        if not self.workers:
+            return fn(*args)
+        self._pending.acquire()
+        try:
+            result, dt, parseos = self._submit(fn, args)
+        finally:
+            self._pending.release()
+        metrics.PARSE_POOL_SECONDS.observe(dt, portal=portal)
+        for portal_parseo, seconds in parseos:
+            metrics.PARSE_SECONDS.observe(seconds, portal=portal_parseo)
+        return result
+
+    def shutdown(self):
+        """Baja los workers (el próximo run los vuelve a levantar)."""
+        with self._guard:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
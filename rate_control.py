@@ -0,0 +1,215 @@
+# rate_control.py
+import json
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from storage import write_atomic
+
+# -------------------------
+# Delay adaptativo por dominio (AIMD)
+# -------------------------
+#
+# Antes cada dominio tenía un delay fijo (10-15 s) y un backoff fijo (4 s x 1.8). Acá el
+# delay entre requests de un dominio se ajusta con lo que responde el portal:
+#
+# - respuesta sana (2xx/3xx/404, sin demora): la tasa (1/delay) sube un poco, sumando
+#   `increase` requests/s -> el delay baja de a poco hasta el piso del dominio;
+# - 429, 5xx o bloqueo (is_google_blocked): el delay se multiplica por `backoff`
+#   -> la tasa cae a la mitad de una, hasta el techo.
+#
+# Además se recuerda el delay con que llegó el problema: durante `cooldown` segundos el
+# delay no vuelve a bajar de ese valor (+`margin`), así AIMD no sale a buscar el límite
+# del portal (y otro 429) en cada ciclo; pasado el cooldown vuelve a probar.
+#
+# Es un token bucket de capacidad 1 (un turno cada `delay` segundos, ver
+# PoliteFetcher.reservar_turno) cuya tasa maneja AIMD. El estado (delay y último
+# request por dominio) se guarda en un JSON, así un reinicio no vuelve a empezar ni
+# pega de inmediato a un portal que acaba de contestar 429.
+
+STATE_VERSION = 1
+STATE_MAX_AGE = 24 * 3600  # estado más viejo que esto no dice nada del portal hoy
+
+
+class AdaptiveRate:
+    def __init__(
+        self,
+        start_delay_by_domain: Optional[Dict[str, float]] = None,
+        default_delay: float = 10.0,
+        floor_by_domain: Optional[Dict[str, float]] = None,
+        default_floor: Optional[float] = None,
+        max_delay: float = 120.0,
+        increase: float = 0.02,
+        backoff: float = 2.0,
+        slow_seconds: float = 8.0,
+        cooldown: float = 1800.0,
+        margin: float = 1.25,
+        path: Optional[str] = None,
+        save_every: float = 30.0,
+        clock=None,
+    ):
+        """
+        start_delay_by_domain / default_delay: delay con que arranca un dominio sin estado.
+        floor_by_domain / default_floor: delay mínimo (sin pisos, el piso es el delay inicial:
+        sólo se endurece ante problemas). max_delay: techo común. path: JSON de estado (None
+        = no se persiste). clock: inyectable (simulaciones con reloj virtual).
+        """
+        self.start_delay_by_domain = dict(start_delay_by_domain or {})
+        self.default_delay = float(default_delay)
+        self.floor_by_domain = dict(floor_by_domain or {})
+        self.default_floor = default_floor
+        self.max_delay = float(max_delay)
+        self.increase = float(increase)
+        self.backoff = float(backoff)
+        self.slow_seconds = float(slow_seconds)
+        self.cooldown = float(cooldown)
+        self.margin = float(margin)
+        self.clock = clock or time.time
+        self.path = path
+        self.save_every = float(save_every)
+
+        self._delay: Dict[str, float] = {}
+        self._last: Dict[str, float] = {}  # último request (o turno reservado), time.time()
+        self._trouble: Dict[str, Tuple[float, float]] = {}  # dominio -> (delay al fallar, cuándo)
+        self._lock = threading.Lock()
+        self._loaded = path is None
+        self._dirty = False
+        self._saved_at = 0.0
+
+    # --- límites ---
+
+    def _start(self, domain: str) -> float:
+        return float(self.start_delay_by_domain.get(domain, self.default_delay))
+
+    def floor(self, domain: str) -> float:
+        if domain in self.floor_by_domain:
+            return float(self.floor_by_domain[domain])
+        if self.default_floor is not None:
+            return min(float(self.default_floor), self._start(domain))
+        return self._start(domain)
+
+    def ceiling(self, domain: str) -> float:
+        return max(self.max_delay, self.floor(domain))
+
+    def _clamp(self, domain: str, delay: float) -> float:
+        return min(self.ceiling(domain), max(self.floor(domain), delay))
+
+    def _piso_actual(self, domain: str) -> float:
+        """El piso, o el delay del último problema (+margin) si fue hace menos de cooldown."""
+        floor = self.floor(domain)
+        trouble = self._trouble.get(domain)
+        if trouble is not None and self.clock() - trouble[1] < self.cooldown:
+            floor = max(floor, min(trouble[0] * self.margin, self.ceiling(domain)))
+        return floor
+
+    # --- estado ---
+
+    def delay(self, domain: str) -> float:
+        with self._lock:
+            return self._delay_locked(domain)
+
+    def _delay_locked(self, domain: str) -> float:
+        self._cargar()
+        d = self._delay.get(domain)
+        if d is None:
+            d = self._delay[domain] = self._clamp(domain, self._start(domain))
+        return d
+
+    def last_request(self, domain: str) -> float:
+        with self._lock:
+            self._cargar()
+            return self._last.get(domain, 0.0)
+
+    def set_last_request(self, domain: str, ts: float) -> None:
+        with self._lock:
+            self._cargar()
+            self._last[domain] = ts
+            self._dirty = True
+
+    def ok(self, domain: str, elapsed: float = 0.0) -> float:
+        """Respuesta sana: +increase requests/s (si no vino lenta). Devuelve el delay nuevo."""
+        with self._lock:
+            d = self._delay_locked(domain)
+            if elapsed < self.slow_seconds:
+                rate = (1.0 / d if d > 0 else float("inf")) + self.increase
+                d = self._delay[domain] = max(min(d, 1.0 / rate), self._piso_actual(domain))
+                self._dirty = True
+        self._guardar_cada()
+        return d
+
+    def penalizar(self, domain: str) -> float:
+        """429 / 5xx / bloqueo: el delay se multiplica por backoff. Devuelve el delay nuevo."""
+        with self._lock:
+            d = self._delay_locked(domain)
+            self._trouble[domain] = (d, self.clock())
+            # con delay 0 (benchmarks) se parte del piso o de 1 s para que el backoff muerda
+            d = self._delay[domain] = self._clamp(domain, max(d, self.floor(domain), 1.0) * self.backoff)
+            self._dirty = True
+        self.guardar()
+        return d
+
+    def estado(self) -> Dict[str, Dict[str, float]]:
+        """delay actual y límites por dominio (para /health y métricas)."""
+        with self._lock:
+            self._cargar()
+            return {
+                domain: {"delay": round(d, 3), "floor": self.floor(domain), "ceiling": self.ceiling(domain)}
+                for domain, d in sorted(self._delay.items())
+            }
+
+    # --- persistencia ---
+
+    def _cargar(self) -> None:
+        # Con self._lock tomado. Se lee al primer uso, no al importar.
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "rb") as f:
+                state = json.loads(f.read())
+        except (OSError, ValueError):
+            return
+        if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+            return
+        if self.clock() - float(state.get("saved_at", 0)) > STATE_MAX_AGE:
+            return
+        for domain, item in (state.get("domains") or {}).items():
+            try:
+                self._delay[domain] = self._clamp(domain, float(item["delay"]))
+                self._last[domain] = float(item.get("last", 0.0))
+                if item.get("trouble"):
+                    self._trouble[domain] = (float(item["trouble"][0]), float(item["trouble"][1]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def guardar(self) -> None:
+        """Escribe el estado si cambió (atómico, ver storage.write_atomic). Errores de disco no cortan el scrape."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = self.clock()
+            state = {
+                "version": STATE_VERSION,
+                "saved_at": now,
+                "domains": {
+                    d: {
+                        "delay": round(v, 3),
+                        "last": round(self._last.get(d, 0.0), 3),
+                        "trouble": [round(x, 3) for x in self._trouble[d]] if d in self._trouble else None,
+                    }
+                    for d, v in self._delay.items()
+                },
+            }
+            self._dirty = False
+            self._saved_at = now
+        try:
+            write_atomic(self.path, json.dumps(state, sort_keys=True).encode("utf-8"))
+        except OSError:
+            with self._lock:
+                self._dirty = True
+
+    def _guardar_cada(self) -> None:
+        if self.path is not None and self.clock() - self._saved_at >= self.save_every:
+            self.guardar()
@@ -1,16 +1,37 @@
 # scraper.py
 import re
+import sys
 import time
+import os
 import json
 import random
-from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
-from urllib.parse import urljoin, urlparse, urlencode, parse_qs
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import asdict, dataclass, replace
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+from urllib.parse import urljoin, urlparse
 
 import requests
 from bs4 import BeautifulSoup
 import urllib3
-import requests_cache
+
+try:
+    import httpx  # opcional: fetch async para el enriquecimiento (ver AsyncPoliteFetcher)
+except ImportError:
+    httpx = None
+
+import keywords
+import metrics
+import near_dupes
+from enrich_cache import EnrichmentCache
+from http_cache import CachingAdapter, HttpCache, cache_key, parse_ttls
+from listing_cache import ListingCache
+from parsing import ParsePool, make_soup, titulo_sitio_texto
+from rate_control import AdaptiveRate
+from source_health import CLOSED, FuenteAbierta, FuenteCaida, SourceBreakers, SourceSnapshots
+from urlnorm import canonical_url, url_key
 
 # -------------------------
 # Config base
@@ -18,10 +39,6 @@ import requests_cache
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-# Cache de respuestas (reduce MUCHO llamadas repetidas)
-# Ajusta expire_after si quieres (en segundos). Ej: 1800 = 30 min, 3600 = 1 hora.
-requests_cache.install_cache("job_cache", expire_after=3600)
-
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15",
@@ -29,31 +46,154 @@ USER_AGENTS = [
 ]
 
 
+DEFAULT_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es-CL,es;q=0.9,en;q=0.8",
+    "Connection": "keep-alive",
+    # UA fijo (más “limpio” que rotarlo para camuflar). Puedes poner tu contacto real.
+    "User-Agent": "JobAggregatorBot/1.0 (contact: tu-email@dominio.com)",
+}
+
+
+# Cache de respuestas de la sesión del scraper (ver http_cache.py). TTL por prefijo
+# "host[/path]"; TTL 0 = no se guarda. Por defecto no se guarda nada, porque nada se
+# volvería a leer:
+# - búsquedas de Google/Indeed: se vuelven a pedir recién cuando vence el TTL de su
+#   fuente (SOURCE_TTLS, horas), y un TTL así de largo le daría al refresh incremental
+#   la página vieja;
+# - listados: van con no-store (bajar_listado revalida con ETag/Last-Modified);
+# - avisos: sólo se bajan cuando enrich_cache no tiene el resultado (3 días, 6 h si
+#   falló), y volver a leer el mismo body repetiría el mismo fallo.
+# HTTP_CACHE_TTL (avisos) y HTTP_CACHE_TTLS lo vuelven a activar, p.ej. para probar un
+# extractor sin volver a pedir las mismas páginas.
+DEFAULT_HTTP_CACHE_TTLS = {
+    "www.google.com/search": 0,
+    "cl.indeed.com/jobs": 0,
+}
+http_cache = HttpCache(
+    os.getenv("HTTP_CACHE_PATH", "http_cache.sqlite"),
+    max_bytes=int(float(os.getenv("HTTP_CACHE_MAX_MB", "64")) * 1024 * 1024),
+    default_ttl=float(os.getenv("HTTP_CACHE_TTL", "0")),
+    ttl_rules={**DEFAULT_HTTP_CACHE_TTLS, **parse_ttls(os.getenv("HTTP_CACHE_TTLS", ""))},
+)
+metrics.HTTP_CACHE_BYTES.set_function(http_cache.size_bytes)
+
+
 def build_session() -> requests.Session:
     s = requests.Session()
-    s.headers.update({
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "es-CL,es;q=0.9,en;q=0.8",
-        "Connection": "keep-alive",
-        # UA fijo (más “limpio” que rotarlo para camuflar). Puedes poner tu contacto real.
-        "User-Agent": "JobAggregatorBot/1.0 (contact: tu-email@dominio.com)",
-    })
+    s.headers.update(DEFAULT_HEADERS)
+    # HTTP_CACHE_PATH="" deja la sesión sin cache
+    if http_cache.path:
+        adapter = CachingAdapter(http_cache)
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
     return s
 
 
+def build_async_session():
+    """
+    Cliente httpx para el event loop de AsyncLoop: keep-alive y pool por origen
+    (httpx mantiene las conexiones de cada host por separado). Ningún dominio tiene
+    más de un request en vuelo (lock por dominio del fetcher), así que el pool casi
+    nunca abre más de una conexión por host.
+    """
+    return httpx.AsyncClient(
+        headers=DEFAULT_HEADERS,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0),
+        follow_redirects=True,
+        verify=True,
+    )
+
+
+# 429/5xx: se reintenta después del backoff. 403 también endurece el delay (suele ser
+# un bloqueo), pero no se reintenta.
+RETRY_STATUS = (429, 500, 502, 503, 504)
+THROTTLE_STATUS = RETRY_STATUS + (403,)
+
+
 class PoliteFetcher:
     """
-    Rate limit por dominio + backoff ante 429/5xx + jitter.
+    Rate limit por dominio + backoff ante 429/5xx + jitter. El delay de cada dominio es
+    adaptativo (ver rate_control.AdaptiveRate): arranca en min_delay_by_domain, baja
+    hacia floor_by_domain mientras el portal responde bien y se duplica (hasta
+    max_delay) ante 429/5xx/bloqueos.
     Esto NO “burla” nada: baja carga, respeta tiempos y evita reintentos agresivos.
     """
 
-    def __init__(self, min_delay_by_domain=None, default_delay=10.0):
-        self.min_delay_by_domain = min_delay_by_domain or {}
-        self.default_delay = float(default_delay)
-        self.last_request_ts = {}
+    def __init__(
+        self,
+        min_delay_by_domain=None,
+        default_delay=10.0,
+        sleep=None,
+        floor_by_domain=None,
+        default_floor=None,
+        max_delay=120.0,
+        state_path=None,
+    ):
+        self.rate = AdaptiveRate(
+            start_delay_by_domain=min_delay_by_domain,
+            default_delay=default_delay,
+            floor_by_domain=floor_by_domain,
+            default_floor=default_floor,
+            max_delay=max_delay,
+            path=state_path,
+        )
+        self.sleep = sleep or time.sleep  # inyectable (benchmarks offline sin esperas)
+        # Un lock por dominio: si dos hilos piden el mismo dominio, esperan en fila
+        self._domain_locks = {}
+        self._guard = threading.Lock()
 
     def _min_delay(self, domain: str) -> float:
-        return float(self.min_delay_by_domain.get(domain, self.default_delay))
+        return self.rate.delay(domain)
+
+    def _domain_lock(self, domain: str) -> threading.Lock:
+        with self._guard:
+            lock = self._domain_locks.get(domain)
+            if lock is None:
+                lock = self._domain_locks[domain] = threading.Lock()
+            return lock
+
+    def reservar_turno(self, domain: str) -> float:
+        """
+        Reserva el próximo turno del dominio y devuelve cuánto esperar hasta él.
+        Como el turno queda anotado antes de dormir, AsyncPoliteFetcher (que comparte
+        estos timestamps) nunca pisa un request de este fetcher, ni al revés.
+        """
+        with self._guard:
+            now = time.time()
+            last = self.rate.last_request(domain)
+            wait = self._min_delay(domain) - (now - last)
+            wait = wait + random.uniform(0.3, 1.2) if wait > 0 else 0.0
+            self.rate.set_last_request(domain, now + wait)
+            return wait
+
+    def marcar_request(self, domain: str) -> None:
+        """El delay se cuenta desde que terminó el último request (o desde el turno reservado, si es posterior)."""
+        with self._guard:
+            self.rate.set_last_request(domain, max(self.rate.last_request(domain), time.time()))
+
+    def penalizar(self, domain: str, reason: str) -> float:
+        """Endurece el delay del dominio (429, 5xx, bloqueo detectado en el HTML...)."""
+        delay = self.rate.penalizar(domain)
+        metrics.RATE_PENALTIES.inc(domain=domain, reason=reason)
+        metrics.RATE_DELAY.set(delay, domain=domain)
+        return delay
+
+    def registrar_respuesta(self, domain: str, resp, elapsed: float) -> Optional[float]:
+        """
+        Ajusta el delay del dominio con la respuesta. Devuelve cuánto esperar antes de
+        reintentar (Retry-After o el delay nuevo + jitter), o None si no hay que reintentar.
+        """
+        status = resp.status_code
+        if status in THROTTLE_STATUS:
+            delay = self.penalizar(domain, str(status))
+            if status not in RETRY_STATUS:
+                return None
+            ra = resp.headers.get("Retry-After")
+            return int(ra) if (ra and ra.isdigit()) else delay + random.uniform(0.5, 2.0)
+        if not getattr(resp, "from_cache", False):
+            metrics.RATE_DELAY.set(self.rate.ok(domain, elapsed), domain=domain)
+        return None
 
     def get(
         self,
@@ -65,41 +205,158 @@ class PoliteFetcher:
         max_retries=3,
         allow_redirects=True
     ):
-        domain = urlparse(url).netloc.lower()
+        domain = dominio_de(url)
         headers = headers or {}
 
-        # 1) Delay mínimo por dominio
-        now = time.time()
-        last = self.last_request_ts.get(domain, 0.0)
-        wait = self._min_delay(domain) - (now - last)
-        if wait > 0:
-            time.sleep(wait + random.uniform(0.3, 1.2))
-
-        # 2) Retries con backoff (y respeto de Retry-After)
-        backoff = 4.0
-        resp = None
-
-        for _ in range(max_retries):
-            resp = session.get(
-                url,
-                params=params,
-                headers=headers,
-                timeout=timeout,
-                allow_redirects=allow_redirects,
-                verify=True,
-            )
-            self.last_request_ts[domain] = time.time()
+        # Delay y retries se hacen con el lock del dominio tomado: dominios distintos
+        # avanzan en paralelo, pero un mismo dominio nunca recibe requests simultáneos.
+        with self._domain_lock(domain):
+            # 1) Delay mínimo por dominio
+            wait = self.reservar_turno(domain)
+            if wait > 0:
+                self.sleep(wait)
+                metrics.SLEEP_SECONDS.inc(wait, domain=domain, reason="politeness")
+
+            # 2) Retries con backoff (y respeto de Retry-After)
+            resp = None
+
+            for attempt in range(max_retries):
+                if attempt:
+                    metrics.HTTP_RETRIES.inc(domain=domain)
+                t0 = time.perf_counter()
+                with metrics.HTTP_SECONDS.time(domain=domain):
+                    resp = session.get(
+                        url,
+                        params=params,
+                        headers=headers,
+                        timeout=timeout,
+                        allow_redirects=allow_redirects,
+                        verify=True,
+                    )
+                self.marcar_request(domain)
+                metrics.HTTP_REQUESTS.inc(domain=domain, status=resp.status_code)
+                metrics.HTTP_CACHE.inc(domain=domain, result="hit" if getattr(resp, "from_cache", False) else "miss")
+
+                sleep_s = self.registrar_respuesta(domain, resp, time.perf_counter() - t0)
+                if sleep_s is not None:
+                    self.sleep(sleep_s)
+                    metrics.SLEEP_SECONDS.inc(sleep_s, domain=domain, reason="backoff")
+                    continue
 
-            if resp.status_code in (429, 500, 502, 503, 504):
-                ra = resp.headers.get("Retry-After")
-                sleep_s = int(ra) if (ra and ra.isdigit()) else (backoff + random.uniform(0.5, 2.0))
-                time.sleep(sleep_s)
-                backoff *= 1.8
-                continue
+                return resp
+
+            return resp
+
+
+class AsyncPoliteFetcher:
+    """
+    Versión async de PoliteFetcher.get (misma firma, con await): las esperas de
+    cortesía y backoff son asyncio.sleep, así cientos de avisos se bajan desde un solo
+    event loop sin un hilo por request. Comparte los turnos y el delay adaptativo por
+    dominio con el PoliteFetcher síncrono (reservar_turno, registrar_respuesta), así
+    que entre los dos siguen respetando el delay de cada dominio.
+    """
+
+    def __init__(self, pacer: PoliteFetcher, cache: Optional[HttpCache] = None, sleep=None):
+        self.pacer = pacer
+        self.cache = cache
+        self.sleep = sleep or asyncio.sleep
+        self._domain_locks: Dict[str, asyncio.Lock] = {}
+
+    def _domain_lock(self, domain: str) -> asyncio.Lock:
+        # sólo se usa desde el hilo del event loop: no hace falta guard
+        lock = self._domain_locks.get(domain)
+        if lock is None:
+            lock = self._domain_locks[domain] = asyncio.Lock()
+        return lock
+
+    async def get(
+        self,
+        session,
+        url: str,
+        params=None,
+        headers=None,
+        timeout=(8, 20),
+        max_retries=3,
+        allow_redirects=True
+    ):
+        domain = dominio_de(url)
+        headers = headers or {}
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+
+        # mismo HttpCache (TTL por prefijo, tope en bytes) y misma clave que la sesión
+        # síncrona; el SQLite corre fuera del event loop
+        key = cache_key(url, params)
+        usable = self.cache is not None and self.cache.cacheable(key)
+        if usable:
+            hit = await asyncio.to_thread(self.cache.get, key)
+            if hit is not None:
+                metrics.HTTP_CACHE.inc(domain=domain, result="hit")
+                status, cached_headers, body = hit
+                resp = httpx.Response(status, headers=cached_headers, content=body, request=httpx.Request("GET", key))
+                resp.from_cache = True
+                return resp
+
+        async with self._domain_lock(domain):
+            wait = self.pacer.reservar_turno(domain)
+            if wait > 0:
+                await self.sleep(wait)
+                metrics.SLEEP_SECONDS.inc(wait, domain=domain, reason="politeness")
+
+            resp = None
+
+            for attempt in range(max_retries):
+                if attempt:
+                    metrics.HTTP_RETRIES.inc(domain=domain)
+                t0 = time.perf_counter()
+                with metrics.HTTP_SECONDS.time(domain=domain):
+                    resp = await session.get(
+                        url,
+                        params=params,
+                        headers=headers,
+                        timeout=timeout,
+                        follow_redirects=allow_redirects,
+                    )
+                self.pacer.marcar_request(domain)
+                metrics.HTTP_REQUESTS.inc(domain=domain, status=resp.status_code)
+                metrics.HTTP_CACHE.inc(domain=domain, result="miss")
+
+                sleep_s = self.pacer.registrar_respuesta(domain, resp, time.perf_counter() - t0)
+                if sleep_s is not None:
+                    await self.sleep(sleep_s)
+                    metrics.SLEEP_SECONDS.inc(sleep_s, domain=domain, reason="backoff")
+                    continue
+
+                if usable and resp.status_code == 200:
+                    await asyncio.to_thread(self.cache.put, key, resp.status_code, resp.headers, resp.content)
+                return resp
 
             return resp
 
-        return resp
+
+class AsyncLoop:
+    """
+    Un event loop persistente en su propio hilo. submit(coro) devuelve un
+    concurrent.futures.Future, igual que DomainScheduler.submit, así el orquestador
+    mezcla ambos sin cambiar cómo espera resultados. Al ser persistente, las conexiones
+    keep-alive del cliente httpx sobreviven entre refreshes.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._guard = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._guard:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="scrape-async", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
 
 
 def is_google_blocked(html: str, final_url: str) -> bool:
@@ -122,9 +379,80 @@ def is_google_blocked(html: str, final_url: str) -> bool:
     return any(s in u for s in signals) or any(s in h for s in signals)
 
 
+class DomainScheduler:
+    """
+    Una cola de trabajo (y un hilo) por dominio.
+    Las tareas de un mismo dominio corren en serie (respetando el delay del fetcher);
+    dominios distintos avanzan en paralelo. submit() devuelve un Future.
+    """
+
+    def __init__(self):
+        self._queues: Dict[str, queue.Queue] = {}
+        self._threads: List[threading.Thread] = []
+        self._guard = threading.Lock()
+        self._closed = False
+
+    def submit(self, domain: str, fn, *args, **kwargs) -> Future:
+        fut: Future = Future()
+        with self._guard:
+            q = self._queues.get(domain)
+            if q is None:
+                q = self._queues[domain] = queue.Queue()
+                t = threading.Thread(target=self._worker, args=(q,), name=f"scrape-{domain}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        q.put((fut, fn, args, kwargs))
+        return fut
+
+    def _worker(self, q: queue.Queue):
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            fut, fn, args, kwargs = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def shutdown(self, cancel_pending: bool = False, wait: bool = True):
+        """
+        Cierra las colas. wait=False no espera lo que está corriendo (deadline del
+        refresh): esos hilos terminan solos y sus resultados se ignoran. Idempotente.
+        """
+        with self._guard:
+            if self._closed:
+                return
+            self._closed = True
+            for q in self._queues.values():
+                if cancel_pending:
+                    while True:
+                        try:
+                            item = q.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is not None:
+                            item[0].cancel()
+                q.put(None)
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Si algo falló no tiene sentido seguir esperando lo que quedaba en cola
+        self.shutdown(cancel_pending=exc_type is not None)
+        return False
+
+
 # Sesión + fetcher global (IMPORTANTE: no recrearlos dentro de cada función)
 session = build_session()
 fetcher = PoliteFetcher(
+    # delay con que arranca cada dominio (sin estado guardado)
     min_delay_by_domain={
         "www.google.com": 12,
         "www.laborum.cl": 10,
@@ -133,36 +461,60 @@ fetcher = PoliteFetcher(
         "cl.indeed.com": 15,
         "www.empleospublicos.cl": 12,
     },
-    default_delay=10.0
+    default_delay=10.0,
+    # hasta dónde puede bajar si el portal responde bien (Google no baja: bloquea rápido)
+    floor_by_domain={
+        "www.google.com": 12,
+        "cl.indeed.com": 8,
+    },
+    default_floor=float(os.getenv("RATE_MIN_DELAY", "3")),
+    max_delay=float(os.getenv("RATE_MAX_DELAY", "180")),
+    # RATE_STATE_PATH="" no guarda el estado entre reinicios
+    state_path=os.getenv("RATE_STATE_PATH", "rate_state.json") or None,
+)
+
+# Fetch async para el enriquecimiento (si httpx está instalado y ASYNC_FETCH no es "0").
+# Comparte los turnos por dominio con `fetcher`.
+ASYNC_FETCH = httpx is not None and os.getenv("ASYNC_FETCH", "1") != "0"
+async_session = build_async_session() if httpx is not None else None
+async_fetcher = AsyncPoliteFetcher(
+    fetcher,
+    cache=http_cache if http_cache.path else None,
+)
+async_loop = AsyncLoop()
+
+# Parseo en procesos aparte, sólo mientras dura un refresh (ver obtener_empleos).
+# PARSE_WORKERS=0 parsea en el hilo que bajó la página
+parse_pool = ParsePool(int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1))))
+
+# Validadores + extracción por URL de listado (ver listing_cache.py)
+listing_cache = ListingCache()
+
+# Resultado de visitar avisos de Google, por canonical_url (ver enrich_cache.py)
+enrich_cache = EnrichmentCache(
+    os.getenv("ENRICH_CACHE_PATH", "enrich_cache.sqlite"),
+    ttl=float(os.getenv("ENRICH_CACHE_TTL", str(3 * 24 * 3600))),
+    negative_ttl=float(os.getenv("ENRICH_CACHE_NEGATIVE_TTL", str(6 * 3600))),
 )
 
 # -------------------------
 # Utilidades
 # -------------------------
 
-def limpiar_texto(texto: Optional[str]) -> str:
-    return re.sub(r"\s+", " ", (texto or "")).strip()
+def dominio_de(url: str) -> str:
+    return urlparse(url).netloc.lower()
 
 
-def canonical_url(url: str) -> str:
-    """
-    Limpia redirecciones típicas de Google (/url?q=...) y trackers comunes para dedupe.
-    """
-    if not url:
-        return url
+_ESPACIOS = re.compile(r"\s+")
 
-    if "/url?q=" in url:
-        url = url.split("/url?q=")[1].split("&")[0]
 
-    parts = urlparse(url)
-    q = parse_qs(parts.query, keep_blank_values=False)
+def limpiar_texto(texto: Optional[str]) -> str:
+    return _ESPACIOS.sub(" ", (texto or "")).strip()
 
-    for k in list(q.keys()):
-        if k.lower() in {"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "gclid", "fbclid", "ref", "refsrc"}:
-            q.pop(k, None)
 
-    new_query = urlencode({k: v[0] for k, v in q.items()})
-    return parts._replace(query=new_query, fragment="").geturl()
+_RE_MINUTOS = re.compile(r"(\d+)\s*(minuto|minutos|min|minute|minutes)")
+_RE_HORAS = re.compile(r"(\d+)\s*(hora|horas|hour|hours)")
+_RE_DIAS = re.compile(r"(\d+)\s*(día|días|dia|dias|day|days)")
 
 
 def parse_relative_time(text: str) -> Optional[int]:
@@ -181,25 +533,34 @@ def parse_relative_time(text: str) -> Optional[int]:
     if "ayer" in t or "yesterday" in t:
         return 24
 
-    m = re.search(r"(\d+)\s*(minuto|minutos|min|minute|minutes)", t)
+    m = _RE_MINUTOS.search(t)
     if m:
         return 0
-    m = re.search(r"(\d+)\s*(hora|horas|hour|hours)", t)
+    m = _RE_HORAS.search(t)
     if m:
         return int(m.group(1))
-    m = re.search(r"(\d+)\s*(día|días|dia|dias|day|days)", t)
+    m = _RE_DIAS.search(t)
     if m:
         return int(m.group(1)) * 24
 
     return None
 
 
+def _o_vacio(listar, **kwargs) -> list:
+    """Para los scrape_* sueltos: una fuente caída es una lista vacía, como siempre."""
+    try:
+        return listar(**kwargs)
+    except FuenteCaida:
+        return []
+
+
 # -------------------------
 # Modelo
 # -------------------------
 
-@dataclass
+@dataclass(slots=True)
 class Job:
+    # slots=True: sin __dict__ por aviso; category/source/location se internan (pocos valores)
     category: str
     role: str
     company: str
@@ -209,6 +570,13 @@ class Job:
     posted_raw: str = ""
     posted_hours_ago: Optional[int] = None
     requirements: Optional[List[str]] = None
+    alt_links: Optional[List[str]] = None  # el mismo aviso en otros portales (ver near_dupes.py)
+    categories: Optional[List[str]] = None  # todas las categorías que calzan (None = sólo category)
+
+    def __post_init__(self):
+        self.category = sys.intern(self.category)
+        self.location = sys.intern(self.location)
+        self.source = sys.intern(self.source)
 
     def to_dict(self) -> Dict:
         return {
@@ -221,17 +589,24 @@ class Job:
             "posted_hours_ago": self.posted_hours_ago,
             "link": self.link,
             "requirements": self.requirements or [],
+            "alt_links": self.alt_links or [],
+            "categories": self.etiquetas(),
         }
 
+    def etiquetas(self) -> List[str]:
+        return self.categories or ([self.category] if self.category else [])
+
 
 # -------------------------
 # Google (fallback)
 # -------------------------
 
-def google_search_links(query: str, days: int = 5, num: int = 10) -> List[Dict]:
+@metrics.SCRAPE_SECONDS.timed(source="GOOGLE")
+def buscar_google(query: str, days: int = 5, num: int = 10) -> List[Dict]:
     """
     Scrape HTML de Google como fallback.
-    Nota: Google puede bloquear en cloud; si detectamos bloqueo devolvemos [].
+    Nota: Google puede bloquear en cloud; si detectamos bloqueo levanta FuenteCaida
+    (el breaker de GOOGLE lo cuenta y el refresh usa el último SERP bueno).
     """
     base = "https://www.google.com/search"
     params = {
@@ -253,13 +628,20 @@ def google_search_links(query: str, days: int = 5, num: int = 10) -> List[Dict]:
     )
 
     if not r or r.status_code != 200:
-        return []
+        raise FuenteCaida("google: status %s" % (r.status_code if r is not None else "sin respuesta"))
 
     if is_google_blocked(r.text, r.url):
-        return []
+        fetcher.penalizar(dominio_de(base), "blocked")
+        raise FuenteCaida("google: consent/captcha")
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    return parse_pool.run(parsear_pagina, "google", r.text, {}, portal="google")
+
+
+def google_search_links(query: str, days: int = 5, num: int = 10) -> List[Dict]:
+    return _o_vacio(buscar_google, query=query, days=days, num=num)
 
+
+def extraer_google(soup: BeautifulSoup) -> List[Dict]:
     # Selector más actual, con fallback al antiguo
     blocks = soup.select("div.tF2Cxc") or soup.select("div.g")
 
@@ -287,160 +669,353 @@ def google_search_links(query: str, days: int = 5, num: int = 10) -> List[Dict]:
 # -------------------------
 # Scrapers directos (best-effort, sin JS)
 # -------------------------
+#
+# Laborum, ChileTrabajos, GetOnBrd y EmpleosPúblicos listan avisos en URLs que NO
+# dependen de la categoría. Por eso cada portal se descarga y parsea UNA vez por
+# refresh (listar_*) y queda como lista de candidatos; después se matchean todas
+# las categorías contra esa lista (agrupar_por_categoria).
+
+@dataclass(slots=True)
+class Candidato:
+    texto: str  # texto contra el que se matchea la keyword
+    job: Job    # aviso ya armado, sin categoría
+
+
+def agrupar_por_categoria(
+    candidatos: List[Candidato],
+    categorias: List[str],
+    max_items: Optional[int] = None,
+    matcher: Optional[keywords.KeywordMatcher] = None
+) -> Dict[str, List[Job]]:
+    """
+    Una sola pasada por los candidatos: cada texto se recorre una vez con el matcher
+    de todas las categorías, y cada aviso queda etiquetado con todas las que calzan.
+    """
+    if matcher is None:
+        matcher = keywords.compilar(tuple(categorias))
+    out: Dict[str, List[Job]] = {cat: [] for cat in categorias}
+
+    for c in candidatos:
+        tags = matcher.categorias_de(c.texto)
+        for cat in tags:
+            if cat not in out:
+                continue
+            if max_items is not None and len(out[cat]) >= max_items:
+                continue
+            out[cat].append(replace(c.job, category=cat, categories=tags))
 
-def scrape_laborum(keyword: str, max_days: int = 5, pages: int = 2) -> List[Job]:
+    return out
+
+
+def filtrar_candidatos(candidatos: List[Candidato], keyword: str, max_items: Optional[int] = None) -> List[Job]:
+    return agrupar_por_categoria(candidatos, [keyword], max_items=max_items)[keyword]
+
+
+# portal -> nombre del extractor. Por nombre (y no la función) para que parsear_pagina
+# resuelva siempre el global actual del módulo, también dentro de un worker.
+EXTRACTORES = {
+    "google": "extraer_google",
+    "laborum": "extraer_laborum",
+    "chiletrabajos": "extraer_chiletrabajos",
+    "getonbrd": "extraer_getonbrd",
+    "indeed": "extraer_indeed",
+    "empleos_publicos": "extraer_empleos_publicos",
+}
+
+
+def parsear_pagina(portal: str, html: str, kwargs: Dict) -> list:
+    """Parseo + extracción de una página de portal. Corre en parse_pool (debe ser picklable)."""
+    return globals()[EXTRACTORES[portal]](make_soup(html, portal), **kwargs)
+
+
+def bajar_listado(url: str, portal: str, **kwargs) -> Optional[List[Candidato]]:
+    """
+    Baja y extrae un listado, revalidando contra lo guardado en listing_cache: si el
+    portal responde 304, o 200 con el mismo body, se reutiliza lo ya extraído y no se
+    parsea. kwargs van al extractor del portal y distinguen extracciones distintas de
+    una misma URL (p.ej. max_days). None si la página no se pudo bajar.
+    """
+    variant = repr(sorted(kwargs.items()))
+    headers = {
+        "User-Agent": random.choice(USER_AGENTS),
+        # el cache HTTP de la sesión no debe contestar por nosotros ni guardar: la revalidación es nuestra
+        "Cache-Control": "no-store",
+    }
+    headers.update(listing_cache.validators(url, variant))
+
+    r = fetcher.get(
+        session=session,
+        url=url,
+        headers=headers,
+        timeout=(8, 20),
+        max_retries=3
+    )
+    if r is not None and r.status_code == 304:
+        value = listing_cache.not_modified(url, variant)
+        if value is not None:
+            metrics.LISTING_CACHE.inc(portal=portal, result="not_modified")
+            return list(value)
+        return None
+    if not r or r.status_code != 200:
+        return None
+
+    digest = ListingCache.digest(r.content)
+    value = listing_cache.same_body(url, digest, variant)
+    if value is not None:
+        metrics.LISTING_CACHE.inc(portal=portal, result="unchanged")
+    else:
+        metrics.LISTING_CACHE.inc(portal=portal, result="changed")
+        value = parse_pool.run(parsear_pagina, portal, r.text, kwargs, portal=portal)
+    listing_cache.put(url, r.headers, digest, value, variant)
+    return list(value)
+
+
+_RE_SEPARADOR = re.compile(r"\s{2,}| - ")
+
+
+def extraer_laborum(soup: BeautifulSoup, max_days: int = 5) -> List[Candidato]:
+    out: List[Candidato] = []
+
+    for a in soup.select('a[href*="/empleos/"]'):
+        href = a.get("href", "")
+        if not href or "empleos-publicacion" in href:
+            continue
+
+        text = limpiar_texto(a.get_text(" ", strip=True))
+        if not text:
+            continue
+
+        link = canonical_url(urljoin("https://www.laborum.cl", href))
+        posted_hours = parse_relative_time(text)
+
+        parts = _RE_SEPARADOR.split(text)
+        role = (parts[0] if parts else text)[:140]
+        company = (parts[1] if len(parts) > 1 else near_dupes.EMPRESA_CONFIDENCIAL)[:120]
+
+        out.append(Candidato(text, Job(
+            category="",
+            role=role,
+            company=company,
+            location="Chile",
+            source="LABORUM",
+            link=link,
+            posted_raw=f"≤ {max_days} días (listado)",
+            posted_hours_ago=posted_hours,
+            requirements=[]
+        )))
+
+    return out
+
+
+@metrics.SCRAPE_SECONDS.timed(source="LABORUM")
+def listar_laborum(max_days: int = 5, pages: int = 2) -> List[Candidato]:
     d = min(max_days, 7)
     url_base = f"https://www.laborum.cl/empleos-publicacion-menor-a-{d}-dias.html"
-    jobs: List[Job] = []
+    out: List[Candidato] = []
+
+    ok = False
 
     for page in range(1, pages + 1):
         url = url_base if page == 1 else f"{url_base}?page={page}"
 
-        r = fetcher.get(
-            session=session,
-            url=url,
-            headers={"User-Agent": random.choice(USER_AGENTS)},
-            timeout=(8, 20),
-            max_retries=3
-        )
-        if not r or r.status_code != 200:
-            continue
+        cands = bajar_listado(url, "laborum", max_days=max_days)
+        ok = ok or cands is not None
+        out += cands or []
 
-        soup = BeautifulSoup(r.text, "html.parser")
+    if not ok:
+        raise FuenteCaida("laborum: ningún listado respondió")
+    return out
 
-        for a in soup.select('a[href*="/empleos/"]'):
-            href = a.get("href", "")
-            if not href or "empleos-publicacion" in href:
-                continue
 
-            text = limpiar_texto(a.get_text(" ", strip=True))
-            if not text or keyword.lower() not in text.lower():
-                continue
+def scrape_laborum(keyword: str, max_days: int = 5, pages: int = 2) -> List[Job]:
+    return filtrar_candidatos(_o_vacio(listar_laborum, max_days=max_days, pages=pages), keyword)
 
-            link = canonical_url(urljoin("https://www.laborum.cl", href))
-            posted_hours = parse_relative_time(text)
 
-            parts = re.split(r"\s{2,}| - ", text)
-            role = (parts[0] if parts else text)[:140]
-            company = (parts[1] if len(parts) > 1 else "Confidencial")[:120]
+def extraer_chiletrabajos(soup: BeautifulSoup) -> List[Candidato]:
+    out: List[Candidato] = []
 
-            jobs.append(Job(
-                category=keyword,
-                role=role,
-                company=company,
-                location="Chile",
-                source="LABORUM",
-                link=link,
-                posted_raw=f"≤ {max_days} días (listado)",
-                posted_hours_ago=posted_hours,
-                requirements=[]
-            ))
+    for h2 in soup.select("h2"):
+        a = h2.find("a", href=True)
+        if not a:
+            continue
 
-    return jobs
+        title = limpiar_texto(a.get_text(" ", strip=True))
+        link = canonical_url(urljoin("https://www.chiletrabajos.cl", a["href"]))
+
+        company = near_dupes.EMPRESA_GENERICA
+        location = "Chile"
+        posted_raw = ""
+
+        node = h2
+        h3s = []
+        for _ in range(3):
+            node = node.find_next_sibling()
+            if node and node.name == "h3":
+                h3s.append(node)
+
+        if len(h3s) >= 1:
+            company_loc = limpiar_texto(h3s[0].get_text(" ", strip=True))
+            if "," in company_loc:
+                company, location = [x.strip() for x in company_loc.split(",", 1)]
+            else:
+                company = company_loc
+
+        if len(h3s) >= 2:
+            posted_raw = limpiar_texto(h3s[1].get_text(" ", strip=True))
+
+        out.append(Candidato(title, Job(
+            category="",
+            role=title[:140],
+            company=company[:120] or near_dupes.EMPRESA_GENERICA,
+            location=location[:80] or "Chile",
+            source="CHILETRABAJOS",
+            link=link,
+            posted_raw=posted_raw,
+            posted_hours_ago=parse_relative_time(posted_raw),
+            requirements=[]
+        )))
 
+    return out
 
-def scrape_chiletrabajos(keyword: str, pages: int = 1) -> List[Job]:
-    jobs: List[Job] = []
+
+@metrics.SCRAPE_SECONDS.timed(source="CHILETRABAJOS")
+def listar_chiletrabajos(pages: int = 1) -> List[Candidato]:
+    out: List[Candidato] = []
     base = "https://www.chiletrabajos.cl/encuentra-un-empleo"
 
+    ok = False
+
     for p in range(1, pages + 1):
         url = base if p == 1 else f"{base}?page={p}"
 
-        r = fetcher.get(
-            session=session,
-            url=url,
-            headers={"User-Agent": random.choice(USER_AGENTS)},
-            timeout=(8, 20),
-            max_retries=3
-        )
-        if not r or r.status_code != 200:
-            continue
+        cands = bajar_listado(url, "chiletrabajos")
+        ok = ok or cands is not None
+        out += cands or []
 
-        soup = BeautifulSoup(r.text, "html.parser")
+    if not ok:
+        raise FuenteCaida("chiletrabajos: ningún listado respondió")
+    return out
 
-        for h2 in soup.select("h2"):
-            a = h2.find("a", href=True)
-            if not a:
-                continue
 
-            title = limpiar_texto(a.get_text(" ", strip=True))
-            if keyword.lower() not in title.lower():
-                continue
-
-            link = canonical_url(urljoin("https://www.chiletrabajos.cl", a["href"]))
+def scrape_chiletrabajos(keyword: str, pages: int = 1) -> List[Job]:
+    return filtrar_candidatos(_o_vacio(listar_chiletrabajos, pages=pages), keyword)
 
-            company = "Empresa"
-            location = "Chile"
-            posted_raw = ""
 
-            node = h2
-            h3s = []
-            for _ in range(3):
-                node = node.find_next_sibling()
-                if node and node.name == "h3":
-                    h3s.append(node)
+def extraer_getonbrd(soup: BeautifulSoup) -> List[Candidato]:
+    out: List[Candidato] = []
 
-            if len(h3s) >= 1:
-                company_loc = limpiar_texto(h3s[0].get_text(" ", strip=True))
-                if "," in company_loc:
-                    company, location = [x.strip() for x in company_loc.split(",", 1)]
-                else:
-                    company = company_loc
+    for a in soup.select('a[href^="/jobs/"]'):
+        href = a.get("href", "")
+        txt = limpiar_texto(a.get_text(" ", strip=True))
+        if not txt:
+            continue
 
-            if len(h3s) >= 2:
-                posted_raw = limpiar_texto(h3s[1].get_text(" ", strip=True))
+        link = canonical_url(urljoin("https://www.getonbrd.com", href))
+        role = txt.split("  ")[0][:140]
 
-            jobs.append(Job(
-                category=keyword,
-                role=title[:140],
-                company=company[:120] or "Empresa",
-                location=location[:80] or "Chile",
-                source="CHILETRABAJOS",
-                link=link,
-                posted_raw=posted_raw,
-                posted_hours_ago=parse_relative_time(posted_raw),
-                requirements=[]
-            ))
+        out.append(Candidato(txt, Job(
+            category="",
+            role=role,
+            company=near_dupes.EMPRESA_VER_LINK,
+            location="Chile/Remoto",
+            source="GETONBRD",
+            link=link,
+            posted_raw="",
+            posted_hours_ago=None,
+            requirements=[]
+        )))
 
-    return jobs
+    return out
 
 
-def scrape_getonbrd(keyword: str, pages: int = 1) -> List[Job]:
-    jobs: List[Job] = []
+@metrics.SCRAPE_SECONDS.timed(source="GETONBRD")
+def listar_getonbrd(pages: int = 1) -> List[Candidato]:
+    out: List[Candidato] = []
     base = "https://www.getonbrd.com/jobs"
 
+    ok = False
+
     for p in range(1, pages + 1):
         url = base if p == 1 else f"{base}?page={p}"
 
-        r = fetcher.get(
-            session=session,
-            url=url,
-            headers={"User-Agent": random.choice(USER_AGENTS)},
-            timeout=(8, 20),
-            max_retries=3
-        )
-        if not r or r.status_code != 200:
+        cands = bajar_listado(url, "getonbrd")
+        ok = ok or cands is not None
+        out += cands or []
+
+    if not ok:
+        raise FuenteCaida("getonbrd: ningún listado respondió")
+    return out
+
+
+def scrape_getonbrd(keyword: str, pages: int = 1) -> List[Job]:
+    return filtrar_candidatos(_o_vacio(listar_getonbrd, pages=pages), keyword)
+
+
+def extraer_indeed(soup: BeautifulSoup, keyword: str, max_days: int = 5) -> List[Job]:
+    jobs: List[Job] = []
+    matcher = keywords.compilar((keyword,))
+
+    found_any = False
+
+    # JSON-LD (cuando existe)
+    for s in soup.select('script[type="application/ld+json"]'):
+        try:
+            data = json.loads(s.get_text())
+        except Exception:
             continue
 
-        soup = BeautifulSoup(r.text, "html.parser")
+        posts = []
+        if isinstance(data, dict) and data.get("@type") == "JobPosting":
+            posts = [data]
+        elif isinstance(data, list):
+            posts = [x for x in data if isinstance(x, dict) and x.get("@type") == "JobPosting"]
+
+        for post in posts:
+            title = limpiar_texto(post.get("title") or "")
+            if not title or not matcher.contiene(title):
+                continue
+
+            org = post.get("hiringOrganization", {}) or {}
+            company = limpiar_texto(org.get("name") or near_dupes.EMPRESA_GENERICA)
+
+            loc = "Chile"
+            if isinstance(post.get("jobLocation"), list) and post["jobLocation"]:
+                addr = post["jobLocation"][0].get("address", {}) or {}
+                loc = limpiar_texto(addr.get("addressLocality") or addr.get("addressRegion") or "Chile")
 
-        for a in soup.select('a[href^="/jobs/"]'):
-            href = a.get("href", "")
-            txt = limpiar_texto(a.get_text(" ", strip=True))
-            if not txt or keyword.lower() not in txt.lower():
+            link = canonical_url(post.get("url") or "")
+            if not link:
                 continue
 
-            link = canonical_url(urljoin("https://www.getonbrd.com", href))
-            role = txt.split("  ")[0][:140]
+            jobs.append(Job(
+                category=keyword,
+                role=title[:140],
+                company=company[:120],
+                location=loc[:80],
+                source="INDEED",
+                link=link,
+                posted_raw=limpiar_texto(post.get("datePosted") or ""),
+                posted_hours_ago=parse_relative_time(limpiar_texto(post.get("datePosted") or "")),
+                requirements=[]
+            ))
+            found_any = True
 
+    # fallback básico si no hubo JSON-LD parseable
+    if not found_any:
+        for a in soup.select('a[href*="/viewjob?"]'):
+            title = limpiar_texto(a.get_text(" ", strip=True))
+            if not title or not matcher.contiene(title):
+                continue
+
+            link = canonical_url(urljoin("https://cl.indeed.com", a.get("href", "")))
             jobs.append(Job(
                 category=keyword,
-                role=role,
-                company="(ver en link)",
-                location="Chile/Remoto",
-                source="GETONBRD",
+                role=title[:140],
+                company=near_dupes.EMPRESA_VER_LINK,
+                location="Chile",
+                source="INDEED",
                 link=link,
-                posted_raw="",
+                posted_raw=f"≤ {max_days} días (Indeed filter)",
                 posted_hours_ago=None,
                 requirements=[]
             ))
@@ -448,9 +1023,11 @@ def scrape_getonbrd(keyword: str, pages: int = 1) -> List[Job]:
     return jobs
 
 
-def scrape_indeed(keyword: str, max_days: int = 5, pages: int = 1) -> List[Job]:
+@metrics.SCRAPE_SECONDS.timed(source="INDEED")
+def listar_indeed(keyword: str, max_days: int = 5, pages: int = 1) -> List[Job]:
     jobs: List[Job] = []
     base = "https://cl.indeed.com/jobs"
+    ok = False
 
     for i in range(pages):
         params = {"q": keyword, "l": "Chile", "fromage": str(max_days), "start": str(i * 10)}
@@ -466,117 +1043,59 @@ def scrape_indeed(keyword: str, max_days: int = 5, pages: int = 1) -> List[Job]:
         if not r or r.status_code != 200:
             continue
 
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        found_any = False
-
-        # JSON-LD (cuando existe)
-        for s in soup.select('script[type="application/ld+json"]'):
-            try:
-                data = json.loads(s.get_text())
-            except Exception:
-                continue
-
-            posts = []
-            if isinstance(data, dict) and data.get("@type") == "JobPosting":
-                posts = [data]
-            elif isinstance(data, list):
-                posts = [x for x in data if isinstance(x, dict) and x.get("@type") == "JobPosting"]
-
-            for post in posts:
-                title = limpiar_texto(post.get("title") or "")
-                if not title or keyword.lower() not in title.lower():
-                    continue
+        ok = True
+        jobs += parse_pool.run(
+            parsear_pagina, "indeed", r.text, {"keyword": keyword, "max_days": max_days}, portal="indeed"
+        )
 
-                org = post.get("hiringOrganization", {}) or {}
-                company = limpiar_texto(org.get("name") or "Empresa")
+    if not ok:
+        raise FuenteCaida(f"indeed: ninguna página respondió ({keyword})")
+    return jobs
 
-                loc = "Chile"
-                if isinstance(post.get("jobLocation"), list) and post["jobLocation"]:
-                    addr = post["jobLocation"][0].get("address", {}) or {}
-                    loc = limpiar_texto(addr.get("addressLocality") or addr.get("addressRegion") or "Chile")
 
-                link = canonical_url(post.get("url") or "")
-                if not link:
-                    continue
+def scrape_indeed(keyword: str, max_days: int = 5, pages: int = 1) -> List[Job]:
+    return _o_vacio(listar_indeed, keyword=keyword, max_days=max_days, pages=pages)
 
-                jobs.append(Job(
-                    category=keyword,
-                    role=title[:140],
-                    company=company[:120],
-                    location=loc[:80],
-                    source="INDEED",
-                    link=link,
-                    posted_raw=limpiar_texto(post.get("datePosted") or ""),
-                    posted_hours_ago=parse_relative_time(limpiar_texto(post.get("datePosted") or "")),
-                    requirements=[]
-                ))
-                found_any = True
 
-        # fallback básico si no hubo JSON-LD parseable
-        if not found_any:
-            for a in soup.select('a[href*="/viewjob?"]'):
-                title = limpiar_texto(a.get_text(" ", strip=True))
-                if not title or keyword.lower() not in title.lower():
-                    continue
+EMPLEOS_PUBLICOS_URL = "https://www.empleospublicos.cl/pub/convocatorias/convocatorias.aspx"
 
-                link = canonical_url(urljoin("https://cl.indeed.com", a.get("href", "")))
-                jobs.append(Job(
-                    category=keyword,
-                    role=title[:140],
-                    company="(ver en link)",
-                    location="Chile",
-                    source="INDEED",
-                    link=link,
-                    posted_raw=f"≤ {max_days} días (Indeed filter)",
-                    posted_hours_ago=None,
-                    requirements=[]
-                ))
-
-    return jobs
 
-
-def scrape_empleos_publicos(keyword: str, max_items: int = 25) -> List[Job]:
-    url = "https://www.empleospublicos.cl/pub/convocatorias/convocatorias.aspx"
-
-    r = fetcher.get(
-        session=session,
-        url=url,
-        headers={"User-Agent": random.choice(USER_AGENTS)},
-        timeout=(8, 20),
-        max_retries=3
-    )
-    if not r or r.status_code != 200:
-        return []
-
-    soup = BeautifulSoup(r.text, "html.parser")
-    jobs: List[Job] = []
+def extraer_empleos_publicos(soup: BeautifulSoup, url: str = EMPLEOS_PUBLICOS_URL) -> List[Candidato]:
+    out: List[Candidato] = []
 
     for a in soup.select('a[href*="convocatoria"]'):
         title = limpiar_texto(a.get_text(" ", strip=True))
         if not title or len(title) < 4:
             continue
-        if keyword.lower() not in title.lower():
-            continue
 
         link = canonical_url(urljoin(url, a.get("href", "")))
 
-        jobs.append(Job(
-            category=keyword,
+        out.append(Candidato(title, Job(
+            category="",
             role=title[:160],
-            company="Servicio Civil / Institución",
+            company=near_dupes.EMPRESA_SERVICIO_CIVIL,
             location="Chile",
             source="EMPLEOSPÚBLICOS",
             link=link,
             posted_raw="(ver plazos en link)",
             posted_hours_ago=None,
             requirements=[]
-        ))
+        )))
 
-        if len(jobs) >= max_items:
-            break
+    return out
+
+
+@metrics.SCRAPE_SECONDS.timed(source="EMPLEOSPÚBLICOS")
+def listar_empleos_publicos() -> List[Candidato]:
+    url = EMPLEOS_PUBLICOS_URL
+    cands = bajar_listado(url, "empleos_publicos")
+    if cands is None:
+        raise FuenteCaida("empleospublicos: el listado no respondió")
+    return cands
 
-    return jobs
+
+def scrape_empleos_publicos(keyword: str, max_items: int = 25) -> List[Job]:
+    return filtrar_candidatos(_o_vacio(listar_empleos_publicos), keyword, max_items=max_items)
 
 
 # -------------------------
@@ -597,6 +1116,7 @@ def infer_source_from_url(url: str) -> str:
     return "OTRO"
 
 
+@metrics.SCRAPE_SECONDS.timed(source="GOOGLE_ENRICH")
 def fetch_title_company_generic(url: str) -> Tuple[str, str, str]:
     """
     Extractor genérico (best-effort) desde la página del aviso.
@@ -611,103 +1131,587 @@ def fetch_title_company_generic(url: str) -> Tuple[str, str, str]:
     if not r or r.status_code != 200:
         return ("", "", "")
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    return parse_pool.run(extraer_generico, r.text, portal="generic")
+
+
+async def fetch_title_company_generic_async(url: str) -> Tuple[str, str, str]:
+    """Igual que fetch_title_company_generic, sobre async_fetcher/async_session."""
+    with metrics.SCRAPE_SECONDS.time(source="GOOGLE_ENRICH"):
+        r = await async_fetcher.get(
+            session=async_session,
+            url=url,
+            headers={"User-Agent": random.choice(USER_AGENTS)},
+            timeout=(8, 20),
+            max_retries=2
+        )
+        if not r or r.status_code != 200:
+            return ("", "", "")
+
+        # el parseo no corre en el event loop: un hilo espera al pool (o parsea, sin pool)
+        return await asyncio.to_thread(parse_pool.run, extraer_generico, r.text, portal="generic")
+
 
-    h1 = soup.find(["h1", "h2"])
-    title = limpiar_texto(h1.get_text(" ", strip=True)) if h1 else ""
+_RE_PUBLICADO = re.compile(r"(publicado|actualizado)\s+hace\s+\d+\s+(minutos|minuto|horas|hora|días|día|dias|dia)")
 
-    company = ""
-    og = soup.find("meta", attrs={"property": "og:site_name"})
-    if og and og.get("content"):
-        company = limpiar_texto(og["content"])
+
+def extraer_generico(html: str, parser: Optional[str] = None) -> Tuple[str, str, str]:
+    h1, site_name, text = titulo_sitio_texto(html, parser=parser)
+    title = limpiar_texto(h1)
+    company = limpiar_texto(site_name)
 
     posted_raw = ""
-    text = soup.get_text(" ", strip=True).lower()
-    m = re.search(r"(publicado|actualizado)\s+hace\s+\d+\s+(minutos|minuto|horas|hora|días|día|dias|dia)", text)
+    text = text.lower()
+    m = _RE_PUBLICADO.search(text)
     if m:
         posted_raw = m.group(0)
 
     return (title, company, posted_raw)
 
 
+def enriquecer_aviso(url: str) -> Tuple[str, str, str]:
+    """
+    fetch_title_company_generic + guardar el resultado en enrich_cache.
+    Un error de red cuenta como fallo (cache negativo) en vez de botar el refresh.
+    """
+    try:
+        result = fetch_title_company_generic(url)
+    except requests.RequestException:
+        result = ("", "", "")
+    enrich_cache.put(url, result)
+    return result
+
+
+async def enriquecer_aviso_async(url: str) -> Tuple[str, str, str]:
+    """enriquecer_aviso sobre el event loop de async_loop."""
+    try:
+        result = await fetch_title_company_generic_async(url)
+    except httpx.HTTPError:
+        result = ("", "", "")
+    enrich_cache.put(url, result)
+    return result
+
+
+def encolar_enriquecimiento(sched: "DomainScheduler", link: str) -> Future:
+    """Con ASYNC_FETCH, todos los avisos se bajan desde un solo event loop; si no, en la cola de su dominio."""
+    if ASYNC_FETCH:
+        return async_loop.submit(enriquecer_aviso_async(link))
+    return sched.submit(dominio_de(link), enriquecer_aviso, link)
+
+
 # -------------------------
 # Dedupe + Orquestador
 # -------------------------
 
+def unir_etiquetas(keep: Job, others: List[Job]) -> Job:
+    """keep con las categorías de others agregadas (el mismo aviso visto bajo otra categoría)."""
+    tags = keep.etiquetas()
+    extra = [c for o in others for c in o.etiquetas() if c not in tags]
+    return replace(keep, categories=list(dict.fromkeys(tags + extra))) if extra else keep
+
+
+def clave_aviso(j: Job) -> int:
+    """
+    Clave de dedupe: url_key de la misma clave de job_store.job_key. Todo Job nace con el
+    link ya pasado por canonical_url (extractores, SERP y snapshots), así que no se
+    vuelve a canonicalizar.
+    """
+    return url_key(j.link or (j.source + "|" + j.role + "|" + j.company))
+
+
+class Deduper:
+    """
+    Dedupe al insertar: guarda sólo avisos únicos (en orden de llegada) y al repetido le
+    suma sus categorías al que ya estaba. La memoria crece con los avisos únicos, no con
+    todo lo que devuelven los portales.
+    """
+
+    def __init__(self):
+        self.jobs: List[Job] = []
+        self._pos: Dict[int, int] = {}  # clave_aviso -> posición en jobs
+        self.vistos = 0
+
+    def agregar(self, jobs: Iterable[Job]) -> List[Job]:
+        """Agrega jobs; devuelve los que eran nuevos."""
+        nuevos = []
+        for j in jobs:
+            self.vistos += 1
+            key = clave_aviso(j)
+            k = self._pos.get(key)
+            if k is not None:
+                self.jobs[k] = unir_etiquetas(self.jobs[k], [j])
+                continue
+            self._pos[key] = len(self.jobs)
+            self.jobs.append(j)
+            nuevos.append(j)
+        return nuevos
+
+    def registrar_metricas(self) -> None:
+        metrics.DEDUPE_IN.inc(self.vistos)
+        metrics.DEDUPE_DROPPED.inc(self.vistos - len(self.jobs))
+
+
 def dedupe_jobs(jobs: List[Job]) -> List[Job]:
-    seen = set()
+    unicos = Deduper()
+    unicos.agregar(jobs)
+    unicos.registrar_metricas()
+    return unicos.jobs
+
+
+# Casi-duplicados entre portales: NEAR_DEDUPE=0 lo apaga
+NEAR_DEDUPE = os.getenv("NEAR_DEDUPE", "1") != "0"
+NEAR_DEDUPE_THRESHOLD = float(os.getenv("NEAR_DEDUPE_THRESHOLD", str(near_dupes.DEFAULT_THRESHOLD)))
+
+
+def fusionar_casi_duplicados(jobs: List[Job]) -> List[Job]:
+    """
+    Junta el mismo aviso publicado en varios portales: queda uno (el más completo, en la
+    posición del primero del grupo) con los links de los demás en alt_links.
+    """
+    if not NEAR_DEDUPE:
+        return jobs
+
     out = []
-    for j in jobs:
-        key = canonical_url(j.link) or (j.source + "|" + j.role + "|" + j.company)
-        if key in seen:
+    for group in near_dupes.agrupar(jobs, threshold=NEAR_DEDUPE_THRESHOLD):
+        principal = near_dupes.elegir_principal(jobs, group)
+        otros = [jobs[i] for i in group if i != principal]
+        alts = [o.link for o in otros if o.link]
+        keep = unir_etiquetas(jobs[principal], otros)
+        out.append(replace(keep, alt_links=alts) if alts else keep)
+
+    metrics.NEAR_DUPES_DROPPED.inc(len(jobs) - len(out))
+    return out
+
+
+# Fuentes caídas (ver source_health.py): breaker por fuente + último resultado bueno
+breakers = SourceBreakers(
+    failure_threshold=int(os.getenv("SOURCE_FAILURE_THRESHOLD", "2")),
+    open_seconds=float(os.getenv("SOURCE_OPEN_SECONDS", "900")),
+)
+source_snapshots = SourceSnapshots(
+    os.getenv("SOURCE_SNAPSHOT_PATH", "source_snapshots.sqlite"),
+    ttl=float(os.getenv("SOURCE_SNAPSHOT_TTL", str(3 * 24 * 3600))),
+)
+# Tiempo máximo de un refresh: lo que no terminó sale del snapshot de su fuente
+REFRESH_DEADLINE_SECONDS = float(os.getenv("REFRESH_DEADLINE_SECONDS", "300"))
+
+
+# Refresh incremental: cada (fuente, categoría) es una unidad con su TTL. Un refresh sólo
+# baja las unidades vencidas (edad de su snapshot >= TTL); el resto sale del snapshot.
+# Los portales bajan un listado para todas las categorías: si vence una, se baja el
+# listado y se renuevan todas. SOURCE_TTLS / SOURCE_MAX_UNITS ("GOOGLE=10800,INDEED=7200")
+# cambian los valores por fuente.
+DEFAULT_SOURCE_TTLS = {
+    "GETONBRD": 10 * 60,           # cambia a cada rato y es barato: todos los refresh
+    "LABORUM": 20 * 60,
+    "CHILETRABAJOS": 20 * 60,
+    "INDEED": 60 * 60,             # una búsqueda por categoría
+    "GOOGLE": 3 * 3600,            # lo más caro y lo que más se bloquea
+    "EMPLEOSPÚBLICOS": 12 * 3600,  # convocatorias: cambian de un día para otro
+}
+# Tope de unidades vencidas por refresh (las que no tienen snapshot no cuentan): reparte
+# las búsquedas de Google entre refreshes en vez de hacerlas todas juntas
+DEFAULT_SOURCE_MAX_UNITS = {"GOOGLE": 3}
+UNIT_TTL_GRACE_SECONDS = 60  # holgura: una unidad que vence justo después del refresh entra en éste
+
+
+def _por_fuente(var: str, defaults: Dict[str, float]) -> Dict[str, float]:
+    out = dict(defaults)
+    for part in os.getenv(var, "").split(","):
+        fuente, _, valor = part.partition("=")
+        try:
+            out[fuente.strip().upper()] = float(valor)
+        except ValueError:
             continue
-        seen.add(key)
-        out.append(j)
     return out
 
 
-def obtener_empleos(max_days: int = 5, google_per_category: int = 8) -> List[Dict]:
-    categorias = [
-        "Planner", "Product Manager", "CPFR", "Category Manager",
-        "Lead Manager", "Mejora Continua", "Proyectos", "Customer",
-        "Business Intelligence"
-    ]
+SOURCE_TTLS = _por_fuente("SOURCE_TTLS", DEFAULT_SOURCE_TTLS)
+SOURCE_MAX_UNITS = _por_fuente("SOURCE_MAX_UNITS", DEFAULT_SOURCE_MAX_UNITS)
+
+
+def planificar(categorias: List[str]) -> Dict[str, List[str]]:
+    """
+    Categorías a bajar por fuente en este refresh, por prioridad: primero las que no
+    tienen snapshot, después las más atrasadas respecto de su TTL (hasta el tope).
+    """
+    try:
+        ages = source_snapshots.unit_ages()
+    except Exception:
+        ages = {}  # sin snapshots se baja todo, como antes
+    plan: Dict[str, List[str]] = {}
+    for fuente, ttl in SOURCE_TTLS.items():
+        nuevas, vencidas = [], []
+        for cat in categorias:
+            age = ages.get((fuente, cat))
+            if age is None:
+                nuevas.append(cat)
+            elif age + UNIT_TTL_GRACE_SECONDS >= ttl:
+                vencidas.append((age / ttl if ttl > 0 else float("inf"), cat))
+        vencidas.sort(key=lambda x: -x[0])
+        tope = SOURCE_MAX_UNITS.get(fuente)
+        if tope is not None:
+            vencidas = vencidas[:max(0, int(tope) - len(nuevas))]
+        plan[fuente] = nuevas + [cat for _, cat in vencidas]
+    return plan
+
+
+def _con_breaker(fuente: str, fn, *args, **kwargs):
+    """Corre fn si el breaker de la fuente lo permite (se consulta al salir de la cola)."""
+    if not breakers.permitir(fuente):
+        raise FuenteAbierta(fuente)
+    return fn(*args, **kwargs)
+
+
+def _registrar_breaker(fuente: str, fut: Future) -> None:
+    if fut.cancelled():
+        return
+    e = fut.exception()
+    if e is None:
+        breakers.exito(fuente)
+    elif not isinstance(e, FuenteAbierta):
+        breakers.fallo(fuente, str(e) or type(e).__name__)
+
+
+def guardar_snapshot(fuente: str, cat: str, jobs: List[Job]) -> None:
+    try:
+        source_snapshots.put(fuente, cat, [asdict(j) for j in jobs])
+    except Exception:
+        pass  # sin snapshot sólo se pierde el respaldo, no el refresh
+
+
+def cargar_snapshot(fuente: str, cat: str) -> List[Job]:
+    """Último resultado bueno de (fuente, categoría), con las horas corridas por su edad."""
+    try:
+        hit = source_snapshots.get(fuente, cat)
+    except Exception:
+        hit = None
+    if not hit:
+        return []
+    items, age = hit
+    out = []
+    for d in items:
+        if d.get("posted_hours_ago") is not None:
+            d["posted_hours_ago"] += int(age // 3600)
+        out.append(Job(**d))
+    return out
+
+
+def estado_fuentes() -> Dict[str, Dict]:
+    """Breaker (y edad del snapshot) por fuente, para /health."""
+    out = breakers.estado()
+    try:
+        ages = source_snapshots.ages()
+    except Exception:
+        ages = {}
+    for source, age in ages.items():
+        out.setdefault(source, {"state": CLOSED})["snapshot_age_seconds"] = age
+    return out
 
-    all_jobs: List[Job] = []
 
-    for cat in categorias:
-        # 1) Portales directos
-        all_jobs += scrape_laborum(cat, max_days=max_days, pages=2)
-        all_jobs += scrape_chiletrabajos(cat, pages=1)
-        all_jobs += scrape_getonbrd(cat, pages=1)
-        all_jobs += scrape_indeed(cat, max_days=max_days, pages=1)
-        all_jobs += scrape_empleos_publicos(cat, max_items=10)
+def _avisar_al_terminar(fut: Future, progreso, fuente: str, armar) -> None:
+    """progreso(fuente, [dicts]) apenas termina fut; armar pasa su resultado a List[Job]."""
+    def cb(f: Future):
+        if f.cancelled() or f.exception() is not None:
+            return
+        _avisar(progreso, fuente, armar(f.result()))
+    fut.add_done_callback(cb)
+
+
+def _avisar(progreso, fuente: str, jobs: List[Job]) -> None:
+    try:
+        progreso(fuente, [j.to_dict() for j in jobs])
+    except Exception:
+        pass  # quien sigue el refresh en vivo nunca debe botar el refresh
+
+
+def iter_unidades(
+    max_days: int = 5, google_per_category: int = 8, progreso=None
+) -> Iterator[Tuple[str, str, List[Job]]]:
+    """
+    El refresh como generador: (fuente, categoría, avisos) por cada unidad, en el orden
+    de siempre (categoría -> fuente), apenas está lista. Los avisos vienen sin dedupe
+    global (ver obtener_empleos / Deduper) y cada lista se puede soltar al consumirla.
+
+    progreso(fuente, avisos), opcional: se llama cuando termina cada portal / categoría,
+    con sus avisos como dicts, antes de que el consumidor llegue a esa unidad.
+
+    Refresh incremental: sólo se bajan las unidades (fuente, categoría) que le tocan
+    según planificar(); el resto sale de su snapshot, con las horas corridas.
+    """
+    # JOB_CATEGORIES las cambia sin tocar código; el matcher se compila una vez por refresh
+    categorias = keywords.categorias_configuradas()
+    matcher = keywords.KeywordMatcher(categorias)
+
+    sitios = (
+        "(site:linkedin.com/jobs OR site:laborum.cl OR site:chiletrabajos.cl OR site:getonbrd.com OR "
+        "site:computrabajo.cl OR site:trabajando.cl OR site:bne.cl OR site:empleospublicos.cl OR site:cl.indeed.com)"
+    )
+
+    def etiquetas(cat: str, texto: str) -> List[str]:
+        """Las categorías que calzan en texto; cat siempre (Indeed/Google buscaron por ella)."""
+        tags = matcher.categorias_de(texto)
+        return tags if cat in tags else [cat] + tags
+
+    def etiquetar(j: Job, texto: str) -> Job:
+        return replace(j, categories=etiquetas(j.category, texto))
+
+    plan = planificar(categorias)
+
+    # Presupuesto del refresh: lo que no terminó a tiempo sale del último snapshot bueno
+    deadline = time.monotonic() + REFRESH_DEADLINE_SECONDS
+    vencidas = set()  # fuentes que ya sumaron un fallo por deadline en este refresh
+
+    def restante() -> float:
+        return max(0.0, deadline - time.monotonic())
+
+    def lanzar(fuente: str, domain: str, fn, *args, **kwargs) -> Future:
+        """Encola una unidad de la fuente; su breaker se consulta al momento de correrla."""
+        fut = sched.submit(domain, _con_breaker, fuente, fn, *args, **kwargs)
+        fut.add_done_callback(lambda f: _registrar_breaker(fuente, f))
+        return fut
+
+    def unidad(fuente: str, cat: str, fut: Optional[Future], armar, razon: str = "open") -> List[Job]:
+        """
+        Avisos de (fuente, categoría): del future si terminó bien antes del deadline (y
+        quedan como snapshot), si no, los del último snapshot bueno.
+        """
+        if fut is not None:
+            try:
+                jobs = armar(fut.result(timeout=restante()))
+            except FutureTimeout:
+                razon = "deadline"
+                if fuente not in vencidas:
+                    vencidas.add(fuente)
+                    breakers.fallo(fuente, "no terminó antes del deadline del refresh")
+            except FuenteAbierta:
+                razon = "open"
+            except Exception:
+                razon = "error"  # el breaker ya lo contó (_registrar_breaker)
+            else:
+                guardar_snapshot(fuente, cat, jobs)
+                metrics.SOURCE_UNITS.inc(source=fuente, result="fetched")
+                return jobs
+        metrics.SOURCE_FALLBACK.inc(source=fuente, reason=razon)
+        return vigente(fuente, cat, "fallback")
+
+    def vigente(fuente: str, cat: str, result: str = "fresh") -> List[Job]:
+        """(fuente, categoría) desde su snapshot: no le tocaba en este refresh, o falló."""
+        jobs = cargar_snapshot(fuente, cat)
+        metrics.SOURCE_UNITS.inc(source=fuente, result=result)
+        if progreso is not None and jobs:
+            _avisar(progreso, fuente, jobs)
+        return jobs
+
+    # Todo se encola por dominio: Google, Indeed y cada portal avanzan en paralelo,
+    # y el armado final sigue el mismo orden (categoría -> fuente) que antes.
+    # Sólo se encola lo que le toca según planificar(), en orden de prioridad.
+    with DomainScheduler() as sched:
+        # 1) Portales directos: cada listado se baja y parsea una sola vez por refresh
+        def listado(fuente: str, domain: str, fn, **kwargs) -> Optional[Future]:
+            return lanzar(fuente, domain, fn, **kwargs) if plan.get(fuente) else None
+
+        f_laborum = listado("LABORUM", "www.laborum.cl", listar_laborum, max_days=max_days, pages=2)
+        f_chiletrabajos = listado("CHILETRABAJOS", "www.chiletrabajos.cl", listar_chiletrabajos, pages=1)
+        f_getonbrd = listado("GETONBRD", "www.getonbrd.com", listar_getonbrd, pages=1)
+        f_empleos_publicos = listado("EMPLEOSPÚBLICOS", dominio_de(EMPLEOS_PUBLICOS_URL), listar_empleos_publicos)
+
+        f_indeed = {
+            cat: lanzar("INDEED", "cl.indeed.com", listar_indeed, cat, max_days=max_days, pages=1)
+            for cat in plan.get("INDEED", [])
+        }
+
+        if progreso is not None:
+            def por_categoria(max_items=None):
+                return lambda cands: [
+                    j for jobs in agrupar_por_categoria(cands, categorias, max_items=max_items, matcher=matcher).values() for j in jobs
+                ]
+            for fuente, f, max_items in (
+                ("LABORUM", f_laborum, None),
+                ("CHILETRABAJOS", f_chiletrabajos, None),
+                ("GETONBRD", f_getonbrd, None),
+                ("EMPLEOSPÚBLICOS", f_empleos_publicos, 10),
+            ):
+                if f is not None:
+                    _avisar_al_terminar(f, progreso, fuente, por_categoria(max_items))
+            for f in f_indeed.values():
+                _avisar_al_terminar(f, progreso, "INDEED", lambda jobs: [etiquetar(j, j.role) for j in jobs])
 
         # 2) Google fallback
-        sitios = (
-            "(site:linkedin.com/jobs OR site:laborum.cl OR site:chiletrabajos.cl OR site:getonbrd.com OR "
-            "site:computrabajo.cl OR site:trabajando.cl OR site:bne.cl OR site:empleospublicos.cl OR site:cl.indeed.com)"
-        )
-        query = f"{cat} empleo Chile {sitios}"
+        f_serp = {
+            cat: lanzar(
+                "GOOGLE", "www.google.com", buscar_google,
+                query=f"{cat} empleo Chile {sitios}", days=max_days, num=google_per_category
+            )
+            for cat in plan.get("GOOGLE", [])
+        }
 
-        serp = google_search_links(query=query, days=max_days, num=google_per_category)
+        # Enriquecer visitando aviso (evitar LinkedIn), en la cola del dominio del aviso;
+        # cada link se visita una sola vez por refresh y lo que ya está en enrich_cache ni
+        # siquiera se encola. Los SERPs no se esperan todos de entrada (eso frenaba el
+        # primer yield): al empezar cada categoría se toman los que ya llegaron y el de la
+        # categoría se espera recién al armar su unidad GOOGLE. Un SERP que falla o no
+        # llega antes del deadline queda en None (se usa el snapshot de esa categoría).
+        serps: Dict[str, Optional[List[Dict]]] = {}
+        serp_error: Dict[str, str] = {}
+        f_enrich: Dict[str, Future] = {}
+        cached: Dict[str, Tuple[Tuple[str, str, str], float]] = {}
+        sin_recibir = dict(f_serp)
+
+        def recibir_serp(cat: str) -> None:
+            """Toma el SERP de cat (esperándolo hasta el deadline) y encola su enriquecimiento."""
+            serps[cat] = None
+            try:
+                serps[cat] = sin_recibir.pop(cat).result(timeout=restante())
+            except FutureTimeout:
+                serp_error[cat] = "deadline"
+                if "GOOGLE" not in vencidas:
+                    vencidas.add("GOOGLE")
+                    breakers.fallo("GOOGLE", "no terminó antes del deadline del refresh")
+                return
+            except FuenteAbierta:
+                serp_error[cat] = "open"
+                return
+            except Exception:
+                serp_error[cat] = "error"
+                return
+            for item in serps[cat]:
+                link = item.get("link", "")  # extraer_google ya la dejó canónica
+                if not link or link in f_enrich or link in cached or infer_source_from_url(link) == "LINKEDIN":
+                    continue
+                hit = enrich_cache.get(link)
+                metrics.ENRICH_CACHE.inc(result="hit" if hit else "miss")
+                if hit:
+                    cached[link] = hit
+                else:
+                    f_enrich[link] = encolar_enriquecimiento(sched, link)
 
-        for item in serp:
-            link = canonical_url(item.get("link", ""))
-            if not link:
+        def recibir_listos() -> None:
+            for cat in [c for c, f in sin_recibir.items() if f.done()]:
+                recibir_serp(cat)
+
+        listados = {
+            "LABORUM": (f_laborum, None),
+            "CHILETRABAJOS": (f_chiletrabajos, None),
+            "GETONBRD": (f_getonbrd, None),
+            "EMPLEOSPÚBLICOS": (f_empleos_publicos, 10),
+        }
+        agrupados: Dict[str, Dict[str, List[Job]]] = {}
+
+        def de_listado(fuente: str, cat: str) -> List[Job]:
+            fut, max_items = listados[fuente]
+            if fut is None:
+                return vigente(fuente, cat)
+
+            def armar(cands):
+                if fuente not in agrupados:
+                    agrupados[fuente] = agrupar_por_categoria(cands, categorias, max_items=max_items, matcher=matcher)
+                return agrupados[fuente][cat]
+            return unidad(fuente, cat, fut, armar)
+
+        for cat in categorias:
+            recibir_listos()
+            yield "LABORUM", cat, de_listado("LABORUM", cat)
+            yield "CHILETRABAJOS", cat, de_listado("CHILETRABAJOS", cat)
+            yield "GETONBRD", cat, de_listado("GETONBRD", cat)
+            if cat in f_indeed:
+                yield "INDEED", cat, unidad("INDEED", cat, f_indeed[cat], lambda jobs: [etiquetar(j, j.role) for j in jobs])
+            else:
+                yield "INDEED", cat, vigente("INDEED", cat)
+            yield "EMPLEOSPÚBLICOS", cat, de_listado("EMPLEOSPÚBLICOS", cat)
+
+            if cat not in f_serp:
+                yield "GOOGLE", cat, vigente("GOOGLE", cat)
+                continue
+            if cat in sin_recibir:
+                recibir_serp(cat)
+            if serps[cat] is None:
+                yield "GOOGLE", cat, unidad("GOOGLE", cat, None, None, razon=serp_error[cat])
                 continue
 
-            src = infer_source_from_url(link)
+            google_jobs: List[Job] = []
+            for item in serps[cat]:
+                link = item.get("link", "")
+                if not link:
+                    continue
+
+                src = infer_source_from_url(link)
+
+                role = item.get("title", "") or cat
+                company = near_dupes.EMPRESA_GENERICA
+                posted_raw = ""
+                age_hours = 0
+
+                enriched = None
+                if link in cached:
+                    enriched, age = cached[link]
+                    age_hours = int(age // 3600)
+                elif link in f_enrich:
+                    try:
+                        enriched = f_enrich[link].result(timeout=restante())
+                    except Exception:
+                        enriched = None  # sin enriquecer: título del SERP
+
+                if enriched:
+                    t, c, p = enriched
+                    if t:
+                        role = t
+                    if c and c.lower() != "google":
+                        company = c
+                    if p:
+                        posted_raw = p
+
+                snippet = item.get("snippet", "") or ""
+
+                # "hace 3 horas" leído hace 2 días son 51 horas
+                posted_hours = parse_relative_time(posted_raw) if posted_raw else None
+                if posted_hours is not None:
+                    posted_hours += age_hours
+
+                google_jobs.append(Job(
+                    category=cat,
+                    role=role[:160],
+                    company=company[:120],
+                    location="Chile",
+                    source=src,
+                    link=link,
+                    posted_raw=posted_raw or snippet[:90],
+                    posted_hours_ago=posted_hours,
+                    requirements=[snippet[:160] + "..."] if snippet else [],
+                    categories=etiquetas(cat, role)
+                ))
 
-            role = item.get("title", "") or cat
-            company = "Empresa"
-            posted_raw = ""
+            guardar_snapshot("GOOGLE", cat, google_jobs)
+            metrics.SOURCE_UNITS.inc(source="GOOGLE", result="fetched")
+            if progreso is not None:
+                _avisar(progreso, "GOOGLE", google_jobs)
+            yield "GOOGLE", cat, google_jobs
 
-            # Enriquecer visitando aviso (evitar LinkedIn)
-            if src != "LINKEDIN":
-                t, c, p = fetch_title_company_generic(link)
-                if t:
-                    role = t
-                if c and c.lower() != "google":
-                    company = c
-                if p:
-                    posted_raw = p
+        if restante() <= 0:
+            # vencido el deadline no se espera a lo que sigue corriendo (ni a lo encolado)
+            for f in f_enrich.values():
+                f.cancel()
+            sched.shutdown(cancel_pending=True, wait=False)
 
-            snippet = item.get("snippet", "") or ""
+    fetcher.rate.guardar()
 
-            all_jobs.append(Job(
-                category=cat,
-                role=role[:160],
-                company=company[:120],
-                location="Chile",
-                source=src,
-                link=link,
-                posted_raw=posted_raw or snippet[:90],
-                posted_hours_ago=parse_relative_time(posted_raw) if posted_raw else None,
-                requirements=[snippet[:160] + "..."] if snippet else []
-            ))
 
-    deduped = dedupe_jobs(all_jobs)
+def obtener_empleos(max_days: int = 5, google_per_category: int = 8, progreso=None) -> List[Dict]:
+    """
+    Consume iter_unidades deduplicando al insertar (Deduper), junta casi-duplicados
+    entre portales y numera. progreso: ver iter_unidades.
+    """
+    unicos = Deduper()
+    try:
+        for _, _, jobs in iter_unidades(max_days, google_per_category, progreso):
+            for j in jobs:
+                metrics.JOBS_FOUND.inc(source=j.source)
+            unicos.agregar(jobs)
+    finally:
+        # entre refreshes no se parsea: los procesos del pool no quedan ociosos
+        parse_pool.shutdown()
+    unicos.registrar_metricas()
+
+    deduped = fusionar_casi_duplicados(unicos.jobs)
     out = []
     for i, j in enumerate(deduped, 1):
         d = j.to_dict()
@@ -718,5 +1722,5 @@ def obtener_empleos(max_days: int = 5, google_per_category: int = 8) -> List[Dic
 
 
 # Alias por compatibilidad si tu server llamaba esto antes
-def obtener_empleos_reales():
-    return obtener_empleos(max_days=5, google_per_category=8)
+def obtener_empleos_reales(progreso=None):
+    return obtener_empleos(max_days=5, google_per_category=8, progreso=progreso)
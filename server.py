@@ -1,11 +1,49 @@
-from fastapi import FastAPI, Response
+from contextlib import asynccontextmanager
+
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from scraper import obtener_empleos_reales
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from scraper import estado_fuentes, obtener_empleos_reales
+import metrics
+from job_index import JobIndex
+from job_store import JobStore
+from job_table import JobTable
+from live_feed import RefreshFeed, iter_json
+from shared_cache import SharedSnapshot
 
+import asyncio
+import base64
+import binascii
+import gzip
+import hashlib
+import json
+import os
 import time
 import threading
+from functools import lru_cache
+
+try:
+    import brotli  # opcional: si no está, servimos gzip/identity
+except ImportError:
+    brotli = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # con varios workers, el snapshot publicado por otro worker manda sobre el store
+    if not _sync_from_shared():
+        _load_from_store()
+    stop = threading.Event()
+    t = threading.Thread(target=_refresher_loop, args=(stop,), name="jobs-refresher", daemon=True)
+    t.start()
+    yield
+    stop.set()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS (idealmente restringe a tu dominio de Render después)
 app.add_middleware(
@@ -20,38 +58,293 @@ app.add_middleware(
 # Cache en memoria (TTL)
 # =========================
 
-CACHE_TTL_SECONDS = 30 * 60  # 30 min (ajusta: 20-60 min recomendado)
+# Cada refresh sólo baja las unidades (fuente, categoría) vencidas (ver scraper.planificar),
+# así que puede correr seguido: las fuentes rápidas se renuevan en cada vuelta y Google
+# o EmpleosPúblicos sólo cuando vence su TTL.
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", str(15 * 60)))
+REFRESH_AHEAD_SECONDS = 5 * 60  # el refresher renueva esto antes de que venza el TTL
+REFRESHER_POLL_SECONDS = 30
+STREAM_CHUNK_ROWS = 500  # avisos por bloque en /jobs?stream=1
+EVENTS_POLL_SECONDS = 2.0        # cada cuánto /jobs/events mira si hay versión nueva
+EVENTS_KEEPALIVE_SECONDS = 15.0  # comentario SSE para que proxies no corten la conexión
 _cache = {
-    "data": [],
+    "data": JobTable(), # snapshot servido, en columnas (ver job_table.py)
+    "payload": None,   # JSON ya serializado/comprimido de "data" (ver _build_payload)
+    "index": None,     # JobIndex sobre "data" (filtros/búsqueda/paginación)
     "ts": 0.0,         # timestamp de última actualización
-    "last_error": None # último error, si hubo
+    "last_error": None, # último error, si hubo
+    "version": None,   # versión del snapshot compartido que estamos sirviendo
+    "sources": {},     # breaker por fuente al final del último refresh (ver source_health.py)
 }
-_lock = threading.Lock()
+# Store persistente: ids estables entre refreshes y arranque sin scrape en frío
+_store = JobStore(
+    os.getenv("JOB_STORE_PATH", "jobs.sqlite"),
+    expire_after=int(os.getenv("JOB_STORE_EXPIRE_AFTER", "3")),  # refreshes sin ver un aviso antes de borrarlo
+)
+# Snapshot compartido entre workers (uvicorn --workers N): un solo worker scrapea
+# (lease) y los demás sirven lo que publicó, vía mmap. Ver shared_cache.py
+_shared = SharedSnapshot(os.getenv("SHARED_CACHE_DIR", ".jobs_shared"))
+# Avisos del refresh en curso, por fuente (para /jobs?stream=1&live=1)
+_feed = RefreshFeed()
+REFRESH_SECONDS = metrics.Histogram("jobs_refresh_seconds", "Duración de cada refresh completo", ["result"])
+CACHE_ITEMS = metrics.Gauge("jobs_cache_items", "Avisos en el snapshot servido")
+CACHE_AGE = metrics.Gauge("jobs_cache_age_seconds", "Edad del snapshot servido")
+CACHE_ITEMS.set_function(lambda: len(_cache["data"]))
+CACHE_AGE.set_function(lambda: time.time() - _cache["ts"] if _cache["ts"] else -1)
+_events_clients = [0]
+EVENTS_CLIENTS = metrics.Gauge("jobs_events_clients", "Clientes conectados a /jobs/events")
+EVENTS_CLIENTS.set_function(lambda: _events_clients[0])
+
+_lock = threading.Lock()       # un solo scrape a la vez
+_bg_lock = threading.Lock()    # protege _bg_running
+_bg_running = False
+_sync_lock = threading.Lock()  # un solo hilo recarga el snapshot compartido
+
+def _build_payload(data: JobTable) -> dict:
+    """
+    Serializa una vez por refresh (mismo formato que el JSONResponse de FastAPI)
+    y deja listas las variantes comprimidas + un ETag por contenido.
+    """
+    body = data.dumps()
+    payload = {
+        "identity": body,
+        "gzip": gzip.compress(body, compresslevel=9),
+        "etag": 'W/"%s"' % hashlib.sha256(body).hexdigest()[:32],
+    }
+    if brotli is not None:
+        payload["br"] = brotli.compress(body, quality=9)
+    return payload
 
-def _is_cache_valid() -> bool:
-    return _cache["data"] and (time.time() - _cache["ts"] < CACHE_TTL_SECONDS)
+def _publish(data, ts: float, payload: Optional[dict] = None, catalog_version: Optional[int] = None):
+    """
+    Deja data + sus derivados (payload, índices) listos para servir. data es un JobTable
+    o la lista de dicts del store/scraper (se pasa a columnas y la lista se suelta).
+    catalog_version (la versión del JobStore) viaja dentro del payload y del índice: quien
+    lee uno de los dos saca de ahí mismo el X-Catalog-Version, nunca de uno más nuevo.
+    """
+    if not isinstance(data, JobTable):
+        data = JobTable.from_dicts(data)
+    payload = payload or _build_payload(data)
+    payload["catalog_version"] = catalog_version
+    _cache["index"] = JobIndex(data, version=payload["etag"], catalog_version=catalog_version)
+    _cache["payload"] = payload
+    _cache["data"] = data
+    _cache["ts"] = ts
+
+_publish([], 0.0)
+
+def _publish_shared(changed: bool):
+    """
+    Publica el snapshot actual para los demás workers (sólo lo llama quien tiene el lease).
+    changed=False (refresh fallido) reusa los archivos ya publicados: sólo cambian ts/last_error.
+    """
+    version = None if changed or not _cache["version"] else _cache["version"]
+    payload = _cache["payload"]
+    try:
+        _cache["version"] = _shared.publish(
+            payload, _cache["ts"], _cache["last_error"], version=version, sources=_cache["sources"],
+            catalog_version=payload["catalog_version"],
+        )
+    except OSError as e:
+        _cache["last_error"] = f"shared: {e}"
 
-def _refresh_cache(force: bool = False):
+def _sync_from_shared(wait: bool = False) -> bool:
     """
-    Refresca el cache si expiró o si force=True.
-    Protegido por lock para evitar scrapes simultáneos.
+    Si otro worker publicó un snapshot nuevo, pasa a servirlo. Barato cuando no hay
+    cambios (un stat), así que se llama en cada request. Devuelve True si cargó algo.
+    """
+    if not _sync_lock.acquire(blocking=wait):
+        return False  # otro hilo ya lo está cargando; mientras, servimos el anterior
+    try:
+        manifest = _shared.read_manifest_if_changed()
+        if manifest is None:
+            return False
+        if manifest["version"] != _cache["version"]:
+            payload = _shared.load(manifest)
+            # data/índices se arman una vez por versión; el body se sirve desde el mmap
+            _publish(
+                json.loads(bytes(payload["identity"])), manifest["ts"], payload,
+                catalog_version=manifest.get("catalog_version"),
+            )
+            _cache["version"] = manifest["version"]
+        _cache["ts"] = manifest["ts"]
+        _cache["last_error"] = manifest.get("last_error")
+        _cache["sources"] = manifest.get("sources") or {}
+        return True
+    except (OSError, ValueError, KeyError) as e:
+        _cache["last_error"] = f"shared: {e}"
+        return False
+    finally:
+        _sync_lock.release()
+
+def _load_from_store():
+    try:
+        data, ts = _store.load()
+        version = _store.version()
+    except Exception as e:
+        _cache["last_error"] = f"store: {e}"
+        return
+    if data:
+        _publish(data, ts, catalog_version=version)
+
+def _encode_cursor(version: str, rank: int) -> str:
+    return base64.urlsafe_b64encode(f"{version}|{rank}".encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str, version: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        cur_version, rank = raw.rsplit("|", 1)
+        rank = int(rank)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="cursor inválido")
+    if cur_version != version:
+        # el catálogo se actualizó: los rangos ya no son comparables
+        raise HTTPException(status_code=410, detail="cursor expirado, vuelve a pedir desde el inicio")
+    return rank
+
+def _pick_encoding(accept_encoding: str, payload: dict) -> str:
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+
+    for enc in ("br", "gzip"):
+        if enc in payload and accepted.get(enc, accepted.get("*", 0.0)) > 0:
+            return enc
+    return "identity"
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == opaque:
+            return True
+    return False
+
+def _is_cache_valid(margin: float = 0.0) -> bool:
+    return _cache["data"] and (time.time() - _cache["ts"] < CACHE_TTL_SECONDS - margin)
+
+def _scrape_into_cache():
+    """
+    Scrapea y publica el resultado. Llamar con _lock y el lease compartido tomados.
+    Los lectores nunca toman _lock: ven la lista anterior hasta el swap.
+    """
+    t0 = time.perf_counter()
+    _feed.start()
+    try:
+        data = obtener_empleos_reales(progreso=_feed.publish)
+        data = data if isinstance(data, list) else []
+        _cache["sources"] = estado_fuentes()
+        # aunque venga vacío, marcamos el refresh: así no martillas si Google bloqueó hoy.
+        # Un resultado vacío no cuenta para expirar avisos del store: seguimos con lo último.
+        if data:
+            data = _store.sync(data)
+            version = _store.version()
+        else:
+            data, version = _cache["data"], _cache["index"].catalog_version
+        _publish(data, time.time(), catalog_version=version)
+        _cache["last_error"] = None
+        REFRESH_SECONDS.observe(time.perf_counter() - t0, result="ok")
+        _publish_shared(changed=True)
+    except Exception as e:
+        REFRESH_SECONDS.observe(time.perf_counter() - t0, result="error")
+        _cache["last_error"] = str(e)
+        _cache["sources"] = estado_fuentes()
+        # NO borramos datos anteriores; servimos lo último bueno
+        _cache["ts"] = time.time()
+        _publish_shared(changed=False)
+    finally:
+        _feed.finish()
+
+def _refresh_cache(force: bool = False, ahead: float = 0.0):
+    """
+    Refresca el cache si expiró (o vence en menos de `ahead` segundos) o si force=True.
+    Protegido por lock (hilos) y por el lease compartido (workers): si otro worker ya
+    está scrapeando no hacemos nada, su snapshot nos llega por _sync_from_shared.
     """
     with _lock:
-        if not force and _is_cache_valid():
+        if not _shared.acquire():
             return
+        try:
+            # pudo haber publicado otro worker justo antes de que tomáramos el lease
+            _sync_from_shared(wait=True)
+            if not force and _is_cache_valid(ahead):
+                return
+            _scrape_into_cache()
+        finally:
+            _shared.release()
 
+def _ensure_warm():
+    """
+    Arranque en frío (nunca hubo refresh): único caso en que un request espera el scrape.
+    Si el refresher (de este u otro worker) ya está scrapeando, esperamos ese mismo
+    scrape en vez de lanzar otro.
+    """
+    with _lock:
+        _sync_from_shared()
+        if _cache["ts"]:
+            return
+        _shared.acquire(blocking=True)
         try:
-            data = obtener_empleos_reales()
-            # aunque venga vacío, lo guardamos: así no martillas si Google bloqueó hoy
-            _cache["data"] = data if isinstance(data, list) else []
-            _cache["ts"] = time.time()
-            _cache["last_error"] = None
-        except Exception as e:
-            _cache["last_error"] = str(e)
-            # NO borramos datos anteriores; servimos lo último bueno
-            if not _cache["data"]:
-                _cache["data"] = []
-            _cache["ts"] = time.time()
+            _sync_from_shared(wait=True)
+            if not _cache["ts"]:
+                _scrape_into_cache()
+        finally:
+            _shared.release()
+
+def _refresh_in_background(force: bool = False, ahead: float = 0.0) -> bool:
+    """
+    Lanza un refresh en otro hilo, salvo que ya haya uno en curso (single-flight).
+    Devuelve True si lo lanzó.
+    """
+    global _bg_running
+    with _bg_lock:
+        if _bg_running:
+            return False
+        _bg_running = True
+
+    def run():
+        global _bg_running
+        try:
+            _refresh_cache(force=force, ahead=ahead)
+        finally:
+            with _bg_lock:
+                _bg_running = False
+
+    threading.Thread(target=run, name="jobs-refresh", daemon=True).start()
+    return True
+
+def _refresher_loop(stop: threading.Event):
+    """
+    Renueva el cache REFRESH_AHEAD_SECONDS antes de que venza, así los requests
+    casi siempre encuentran datos frescos. También hace el warm-up al arrancar.
+    Corre en todos los workers; el lease deja que sólo uno scrapee.
+    """
+    while not stop.is_set():
+        _sync_from_shared()
+        due = _cache["ts"] + CACHE_TTL_SECONDS - REFRESH_AHEAD_SECONDS if _cache["ts"] else 0.0
+        if time.time() >= due:
+            if not _cache["ts"]:
+                _ensure_warm()
+            else:
+                _refresh_in_background(ahead=REFRESH_AHEAD_SECONDS)
+        stop.wait(REFRESHER_POLL_SECONDS)
 
 
 @app.get("/")
@@ -60,39 +353,267 @@ def home():
 
 
 @app.get("/jobs")
-def get_jobs(response: Response, refresh: int = 0):
+def get_jobs(
+    request: Request,
+    refresh: int = 0,
+    category: Optional[str] = None,
+    source: Optional[str] = None,
+    max_hours: Optional[int] = Query(None, ge=0),
+    q: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    stream: int = 0,
+    live: int = 0,
+):
     """
-    refresh=1 fuerza actualización (útil para ti, no para el frontend).
-    Por defecto sirve cache (evita bloqueos y acelera la web).
+    refresh=1 lanza una actualización en segundo plano (útil para ti, no para el frontend).
+    Por defecto sirve cache; si está vencido lo sirve igual (X-Cache: STALE) mientras
+    se refresca en background. Solo el arranque en frío espera al scrape.
+    El body sale pre-serializado (gzip/br según Accept-Encoding) y con ETag: si el
+    cliente ya lo tiene (If-None-Match) respondemos 304 sin body.
+
+    Filtros opcionales (category, source, max_hours, q sobre rol/empresa) y paginación
+    (limit/offset o cursor) se resuelven con los índices de JobIndex; en ese caso los
+    avisos vienen del más reciente al más antiguo, con X-Total-Count y X-Next-Cursor.
+
+    stream=1 (o Accept: application/x-ndjson) manda el JSON por bloques directo desde el
+    snapshot, sin armar el documento entero; con NDJSON, un aviso por línea. live=1
+    además sigue el refresh en curso: entrega los avisos a medida que termina cada
+    fuente (todavía sin id) y cierra cuando el refresh termina.
+
+    X-Catalog-Version: versión del catálogo servido; con ella, /jobs/changes?since= o
+    /jobs/events entregan sólo lo que cambió después.
     """
     force = bool(refresh)
+    headers = {}
+    ndjson = "application/x-ndjson" in request.headers.get("accept", "")
+    _sync_from_shared()
+
+    if not _cache["ts"] and live:
+        # en frío no esperamos el scrape: el stream lo va mostrando
+        _refresh_in_background()
+        status = "REFRESHING"
+    elif not _cache["ts"]:
+        _ensure_warm()
+        status = "REFRESHED" if _cache["data"] else "EMPTY"
+    elif force:
+        started = _refresh_in_background(force=True)
+        headers["X-Refresh"] = "started" if started else "in-progress"
+        # lo servido sigue vigente: el refresh forzado sólo se informa en X-Refresh
+        status = "HIT" if _is_cache_valid() else "STALE"
+    elif _is_cache_valid():
+        status = "HIT"
+    else:
+        _refresh_in_background()
+        status = "STALE"
 
-    # Si cache válido y no forzado => no scrapea
-    if not force and _is_cache_valid():
-        response.headers["X-Cache"] = "HIT"
-        response.headers["Cache-Control"] = f"public, max-age={CACHE_TTL_SECONDS}"
-        return _cache["data"]
+    if stream or live or ndjson:
+        return _stream_jobs(headers, status, ndjson, bool(live), category, source, max_hours, q, limit, offset, cursor)
 
-    # Si no hay cache válido => refresca (una sola vez por lock)
-    _refresh_cache(force=force)
+    if any(x is not None for x in (category, source, max_hours, q, limit, cursor)) or offset:
+        return _filtered_jobs(request, headers, status, category, source, max_hours, q, limit, offset, cursor)
 
-    response.headers["X-Cache"] = "MISS" if force else ("REFRESHED" if _cache["data"] else "EMPTY")
-    response.headers["Cache-Control"] = f"public, max-age={CACHE_TTL_SECONDS}"
+    payload = _cache["payload"]
+    _catalog_header(headers, payload["catalog_version"])
+    headers["X-Cache"] = status
+    headers["Cache-Control"] = "no-cache" if status == "STALE" else f"public, max-age={CACHE_TTL_SECONDS}"
+    headers["ETag"] = payload["etag"]
+    headers["Vary"] = "Accept-Encoding"
     if _cache["last_error"]:
-        response.headers["X-Last-Error"] = _cache["last_error"][:200]
+        headers["X-Last-Error"] = _cache["last_error"][:200]
+
+    if _etag_matches(request.headers.get("if-none-match", ""), payload["etag"]):
+        return Response(status_code=304, headers=headers)
+
+    encoding = _pick_encoding(request.headers.get("accept-encoding", ""), payload)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=payload[encoding], media_type="application/json", headers=headers)
+
+
+def _search_page(index: JobIndex, headers: dict, category, source, max_hours, q, limit, offset, cursor):
+    """Rangos de la página pedida; deja X-Total-Count y X-Next-Cursor en headers."""
+    after = _decode_cursor(cursor, index.version) if cursor else None
+
+    ranks = index.search(category=category, source=source, max_hours=max_hours, q=q)
+    page = index.page(ranks, after=after, offset=offset, limit=limit)
+
+    headers["X-Total-Count"] = str(len(ranks))
+    if limit is not None and page and page[-1] != ranks[-1]:
+        headers["X-Next-Cursor"] = _encode_cursor(index.version, page[-1])
+    return page
+
+
+def _catalog_header(headers: dict, catalog_version: Optional[int]) -> None:
+    if catalog_version is not None:
+        headers["X-Catalog-Version"] = str(catalog_version)
+
+
+def _filtered_jobs(request, headers, status, category, source, max_hours, q, limit, offset, cursor):
+    index = _cache["index"]
+    _catalog_header(headers, index.catalog_version)
+    page = _search_page(index, headers, category, source, max_hours, q, limit, offset, cursor)
+
+    headers["X-Cache"] = status
+    headers["Cache-Control"] = "no-cache" if status == "STALE" else f"public, max-age={CACHE_TTL_SECONDS}"
+    # cada página sólo cambia si cambia el snapshot
+    etag = 'W/"%s"' % hashlib.sha256(f"{index.version}|{request.url.query}".encode("utf-8")).hexdigest()[:32]
+    headers["ETag"] = etag
+    if _cache["last_error"]:
+        headers["X-Last-Error"] = _cache["last_error"][:200]
+
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=index.dumps(page), media_type="application/json", headers=headers)
+
+
+def _stream_jobs(headers, status, ndjson, live, category, source, max_hours, q, limit, offset, cursor):
+    # el generador se queda con este snapshot aunque se publique otro a mitad del stream
+    index = _cache["index"]
+    _catalog_header(headers, index.catalog_version)
+    media_type = "application/x-ndjson" if ndjson else "application/json"
+    headers["Cache-Control"] = "no-cache"
+    if _cache["last_error"]:
+        headers["X-Last-Error"] = _cache["last_error"][:200]
+
+    # el refresh corre en este worker (con varios workers, en el que tiene el lease)
+    if live and _feed.wait_active(timeout=2.0 if status == "REFRESHING" else 0.0):
+        headers["X-Cache"] = "LIVE"
+        return StreamingResponse(iter_json(_feed.follow(), ndjson=ndjson), media_type=media_type, headers=headers)
+
+    headers["X-Cache"] = status
+    if any(x is not None for x in (category, source, max_hours, q, limit, cursor)) or offset:
+        page = _search_page(index, headers, category, source, max_hours, q, limit, offset, cursor)
+        rows = (index.order[r] for r in page)
+    else:
+        rows = None  # todo el catálogo, en el mismo orden que /jobs sin stream
+    body = index.table.iter_dumps(rows, chunk_rows=STREAM_CHUNK_ROWS, ndjson=ndjson)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+
+@lru_cache(maxsize=64)
+def _changes_payload(since: int, until: int) -> Optional[dict]:
+    """
+    Delta since -> until ya serializado (y en gzip). Los clientes al día piden todos el
+    mismo (desde la versión anterior), así que se arma una vez. None: hay que bajar /jobs.
+    """
+    changes = _store.changes(since, until)
+    if changes is None:
+        return None
+    body = json.dumps(changes, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    return {
+        "identity": body,
+        "gzip": gzip.compress(body, compresslevel=6),
+        "etag": 'W/"changes-%d-%d"' % (since, until),
+    }
+
+
+@app.get("/jobs/changes")
+def get_job_changes(request: Request, since: int = Query(..., ge=0)):
+    """
+    Avisos agregados, cambiados y borrados desde la versión `since` (la de X-Catalog-Version
+    del /jobs que tiene el cliente), por link: {"since", "version", "added", "changed",
+    "removed"}. added/changed traen el aviso completo con id; removed sólo id y link.
+    410 si `since` es más viejo que los cambios guardados: toca volver a bajar /jobs.
+    """
+    _sync_from_shared()
+    version = _cache["index"].catalog_version
+    if version is None:
+        raise HTTPException(status_code=503, detail="catálogo sin versión todavía, pide /jobs")
+    payload = _changes_payload(since, version)
+    if payload is None:
+        raise HTTPException(status_code=410, detail="since fuera de los cambios guardados, vuelve a bajar /jobs")
+
+    headers = {
+        "ETag": payload["etag"],
+        "X-Catalog-Version": str(version),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request.headers.get("if-none-match", ""), payload["etag"]):
+        return Response(status_code=304, headers=headers)
+
+    encoding = _pick_encoding(request.headers.get("accept-encoding", ""), payload)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=payload[encoding], media_type="application/json", headers=headers)
 
-    return _cache["data"]
+
+def _sse(event: str, data: bytes, event_id: Optional[int] = None) -> bytes:
+    head = b"event: %s\n" % event.encode("ascii")
+    if event_id is not None:
+        head += b"id: %d\n" % event_id
+    return head + b"data: " + data + b"\n\n"
+
+
+async def _iter_events(since: Optional[int]):
+    _events_clients[0] += 1
+    try:
+        yield b"retry: 10000\n\n"
+        beat = time.monotonic()
+        while True:
+            # con varios workers la versión nueva llega por el snapshot compartido
+            await run_in_threadpool(_sync_from_shared)
+            version = _cache["index"].catalog_version
+            if since is None:
+                since = version  # sin since: desde lo que hay ahora
+            if version is not None and version != since:
+                payload = await run_in_threadpool(_changes_payload, since, version)
+                if payload is None:
+                    yield _sse("reset", b'{"version":%d}' % version, version)
+                else:
+                    yield _sse("changes", payload["identity"], version)
+                since = version
+                beat = time.monotonic()
+            elif time.monotonic() - beat >= EVENTS_KEEPALIVE_SECONDS:
+                yield b": keepalive\n\n"
+                beat = time.monotonic()
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+    finally:
+        _events_clients[0] -= 1
+
+
+@app.get("/jobs/events")
+async def job_events(request: Request, since: Optional[int] = Query(None, ge=0)):
+    """
+    Server-sent events: un evento "changes" (el mismo JSON de /jobs/changes) por cada
+    versión nueva del catálogo, con id = versión. Al reconectar, el navegador manda
+    Last-Event-ID y se retoma desde ahí (since= hace lo mismo a mano). Si esa versión ya
+    no tiene deltas guardados llega un evento "reset": toca volver a bajar /jobs.
+    """
+    last_id = request.headers.get("last-event-id", "")
+    if since is None and last_id.isdigit():
+        since = int(last_id)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(_iter_events(since), media_type="text/event-stream", headers=headers)
 
 
 @app.get("/health")
 def health():
     """
-    Útil para monitoreo.
+    Útil para monitoreo. "sources": estado del circuit breaker de cada fuente al final
+    del último refresh (closed / open / half_open, fallos seguidos, último error y edad
+    de su snapshot de respaldo).
     """
     age = time.time() - _cache["ts"] if _cache["ts"] else None
     return {
         "ok": True,
-        "cache_items": len(_cache["data"]) if _cache["data"] else 0,
+        "cache_items": len(_cache["data"]),
         "cache_age_seconds": age,
         "last_error": _cache["last_error"],
+        "refreshing": _bg_running or _lock.locked(),
+        "sources": _cache["sources"],
+        "catalog_version": _cache["index"].catalog_version,
     }
+
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Métricas en formato Prometheus: latencias por dominio, sleeps (politeness vs backoff),
+    status/reintentos, hits del cache HTTP, parseo por portal, avisos por fuente y dedupe.
+    """
+    return Response(content=metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,131 @@
+# shared_cache.py
+import json
+import mmap
+import os
+import time
+from typing import Dict, Optional
+
+try:
+    import fcntl  # lease entre procesos (Linux/macOS)
+except ImportError:
+    fcntl = None
+
+from storage import write_atomic
+
+# -------------------------
+# Snapshot compartido entre workers (uvicorn --workers N)
+# -------------------------
+#
+# Un solo worker scrapea a la vez: el que toma el lease (flock sobre refresh.lock; el
+# sistema lo suelta solo si el proceso muere). Ese worker publica el snapshot como
+# archivos inmutables <version>.identity/.gzip/.br y después reemplaza manifest.json de
+# forma atómica (os.replace). Los demás workers ven cambiar el manifest, mapean esos
+# archivos con mmap y sirven el body directo desde ahí: no se copia por request y la
+# página queda compartida en el page cache entre todos los procesos.
+
+ENCODINGS = ("identity", "gzip", "br")
+KEEP_VERSIONS = 3  # versiones viejas que se dejan en disco (requests en vuelo)
+
+
+class SharedSnapshot:
+    def __init__(self, directory: str = ".jobs_shared"):
+        self.dir = directory
+        self._lock_fd: Optional[int] = None
+        self._manifest_mtime = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def _ensure_dir(self) -> None:
+        os.makedirs(self.dir, exist_ok=True)
+
+    # --- lease ---
+
+    def acquire(self, blocking: bool = False) -> bool:
+        """Toma el lease de refresh. Sin fcntl (Windows) siempre se concede: un solo proceso."""
+        if fcntl is None:
+            return True
+        self._ensure_dir()
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self._path("refresh.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+        return True
+
+    def release(self) -> None:
+        if fcntl is not None and self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    # --- publicar / leer ---
+
+    def publish(
+        self,
+        payload: Dict,
+        ts: float,
+        last_error: Optional[str] = None,
+        version: Optional[str] = None,
+        sources: Optional[Dict] = None,
+        catalog_version: Optional[int] = None,
+    ) -> str:
+        """
+        Escribe el payload (si version es None) y el manifest. Con version dada sólo se
+        actualiza el manifest (p.ej. un refresh que falló: mismo body, nuevo ts/last_error).
+        sources: estado por fuente del scraper (breakers), para el /health de todos los workers.
+        catalog_version: versión del JobStore que corresponde a este payload (/jobs/changes).
+        """
+        self._ensure_dir()
+        if version is None:
+            version = "%d-%s" % (time.time() * 1000, payload["etag"].strip('W/"')[:12])
+            for enc in ENCODINGS:
+                if enc in payload:
+                    write_atomic(self._path(f"{version}.{enc}"), bytes(payload[enc]))
+
+        manifest = {
+            "version": version,
+            "etag": payload["etag"],
+            "encodings": [enc for enc in ENCODINGS if enc in payload],
+            "ts": ts,
+            "last_error": last_error,
+            "sources": sources or {},
+            "catalog_version": catalog_version,
+        }
+        write_atomic(self._path("manifest.json"), json.dumps(manifest).encode("utf-8"))
+        self._cleanup(version)
+        return version
+
+    def _cleanup(self, current: str) -> None:
+        versions = sorted({n.split(".", 1)[0] for n in os.listdir(self.dir) if n.endswith(ENCODINGS) and "-" in n})
+        old = [v for v in versions if v != current][:-KEEP_VERSIONS or None]
+        for v in old:
+            for enc in ENCODINGS:
+                try:
+                    os.remove(self._path(f"{v}.{enc}"))
+                except FileNotFoundError:
+                    pass
+
+    def read_manifest_if_changed(self) -> Optional[Dict]:
+        """Manifest nuevo si cambió desde la última lectura (un stat por llamada), si no None."""
+        try:
+            mtime = os.stat(self._path("manifest.json")).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime == self._manifest_mtime:
+            return None
+        try:
+            with open(self._path("manifest.json"), "rb") as f:
+                manifest = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        self._manifest_mtime = mtime
+        return manifest
+
+    def load(self, manifest: Dict) -> Dict:
+        """Payload con el mismo formato que server._build_payload, pero con memoryviews sobre mmap."""
+        payload = {"etag": manifest["etag"]}
+        for enc in manifest["encodings"]:
+            with open(self._path(f'{manifest["version"]}.{enc}'), "rb") as f:
+                # el mmap sigue vivo aunque se cierre el archivo (y aunque se borre después)
+                payload[enc] = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return payload
@@ -0,0 +1,187 @@
+# source_health.py
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from storage import LazySqlite
+
+# -------------------------
+# Fuentes caídas: circuit breaker + último resultado bueno por fuente
+# -------------------------
+#
+# Un portal caído (o Google devolviendo consent/captcha) costaba max_retries x backoff
+# en CADA categoría de CADA refresh. Con el breaker, después de `failure_threshold`
+# fallos seguidos la fuente queda "open": no se le pide nada y se sirve su último
+# resultado bueno (SourceSnapshots). Pasado `open_seconds` queda "half_open": se deja
+# pasar UNA unidad de prueba (probe); si anda vuelve a "closed", si no se abre de nuevo
+# por el doble de tiempo (hasta max_open_seconds).
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class FuenteCaida(Exception):
+    """La fuente no entregó nada (todas sus páginas fallaron o vino bloqueada)."""
+
+
+class FuenteAbierta(Exception):
+    """El breaker de la fuente está abierto: ni se intentó."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 2, open_seconds: float = 900.0, max_open_seconds: float = 6 * 3600, clock=None):
+        self.failure_threshold = int(failure_threshold)
+        self.open_seconds = float(open_seconds)
+        self.max_open_seconds = float(max_open_seconds)
+        self.clock = clock or time.time
+
+        self.state = CLOSED
+        self.failures = 0            # fallos seguidos
+        self.opened_at = 0.0
+        self.cooldown = self.open_seconds
+        self.probe_in_flight = False
+        self.last_error: Optional[str] = None
+        self.last_success = 0.0
+
+    def permitir(self) -> bool:
+        """¿Se le puede pedir a la fuente? En half_open deja pasar sólo un probe a la vez."""
+        if self.state == OPEN and self.clock() - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def exito(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = self.open_seconds
+        self.probe_in_flight = False
+        self.last_success = self.clock()
+
+    def fallo(self, error: str) -> None:
+        self.failures += 1
+        self.last_error = error[:200]
+        if self.state == HALF_OPEN:
+            # el probe falló: de vuelta a open, por más tiempo
+            self.cooldown = min(self.cooldown * 2, self.max_open_seconds)
+            self._abrir()
+        elif self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._abrir()
+
+    def _abrir(self) -> None:
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self.probe_in_flight = False
+
+    def estado(self) -> Dict:
+        out = {"state": self.state, "consecutive_failures": self.failures, "last_error": self.last_error}
+        if self.state == OPEN:
+            out["retry_in_seconds"] = round(max(0.0, self.opened_at + self.cooldown - self.clock()), 1)
+        if self.last_success:
+            out["last_success_ago_seconds"] = round(self.clock() - self.last_success, 1)
+        return out
+
+
+class SourceBreakers:
+    """Un CircuitBreaker por fuente (LABORUM, INDEED, GOOGLE...), thread-safe."""
+
+    def __init__(self, **breaker_kwargs):
+        self._kwargs = breaker_kwargs
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, source: str) -> CircuitBreaker:
+        b = self._breakers.get(source)
+        if b is None:
+            b = self._breakers[source] = CircuitBreaker(**self._kwargs)
+        return b
+
+    def permitir(self, source: str) -> bool:
+        with self._lock:
+            return self._get(source).permitir()
+
+    def exito(self, source: str) -> None:
+        with self._lock:
+            self._get(source).exito()
+
+    def fallo(self, source: str, error: str) -> None:
+        with self._lock:
+            self._get(source).fallo(error)
+
+    def state(self, source: str) -> str:
+        with self._lock:
+            return self._get(source).state
+
+    def estado(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {source: b.estado() for source, b in sorted(self._breakers.items())}
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS source_snapshot (
+    source     TEXT NOT NULL,
+    category   TEXT NOT NULL,
+    jobs       TEXT NOT NULL,  -- JSON: lista de campos de Job
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (source, category)
+);
+"""
+
+
+class SourceSnapshots(LazySqlite):
+    """
+    Último resultado bueno por (fuente, categoría), en SQLite: lo que se sirve de una
+    fuente abierta o que no terminó antes del deadline del refresh. Entradas más viejas
+    que `ttl` no se usan (mejor nada que avisos de hace una semana).
+    """
+
+    SCHEMA = SCHEMA
+
+    def __init__(self, path: str = "source_snapshots.sqlite", ttl: float = 3 * 24 * 3600):
+        super().__init__(path)
+        self.ttl = float(ttl)
+
+    def put(self, source: str, category: str, jobs: List[Dict], now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        data = json.dumps(jobs, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            db = self._db()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO source_snapshot (source, category, jobs, fetched_at) VALUES (?, ?, ?, ?)",
+                    (source, category, data, now),
+                )
+
+    def get(self, source: str, category: str, now: Optional[float] = None) -> Optional[Tuple[List[Dict], float]]:
+        """(avisos, edad_en_segundos) o None si no hay snapshot vigente."""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._db().execute(
+                "SELECT jobs, fetched_at FROM source_snapshot WHERE source = ? AND category = ?",
+                (source, category),
+            ).fetchone()
+        if not row:
+            return None
+        age = now - row[1]
+        if age >= self.ttl:
+            return None
+        return json.loads(row[0]), age
+
+    def unit_ages(self, now: Optional[float] = None) -> Dict[Tuple[str, str], float]:
+        """Edad de cada (fuente, categoría) vigente: qué unidades le toca bajar a un refresh."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._db().execute("SELECT source, category, fetched_at FROM source_snapshot").fetchall()
+        return {(source, category): now - ts for source, category, ts in rows if now - ts < self.ttl}
+
+    def ages(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Edad del snapshot más viejo por fuente (para /health)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._db().execute("SELECT source, MIN(fetched_at) FROM source_snapshot GROUP BY source").fetchall()
+        return {source: round(now - ts, 1) for source, ts in rows}
@@ -0,0 +1,50 @@
+# storage.py
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+# -------------------------
+# Persistencia en disco compartida por los stores
+# -------------------------
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Escribe a un temporal y lo renombra encima: quien lee ve el archivo viejo o el nuevo
+    completo. El fsync antes del rename evita que un corte deje el archivo vacío.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class LazySqlite:
+    """
+    Base de los stores SQLite (JobStore, EnrichmentCache, SourceSnapshots, HttpCache).
+    La base se abre al primer uso (no al importar), en WAL y con SCHEMA aplicado; la
+    conexión se comparte entre hilos, siempre con self._lock tomado. _al_abrir(conn)
+    corre una vez, recién abierta (limpieza de vencidos, migraciones).
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+            self._al_abrir(conn)
+        return self._conn
+
+    def _al_abrir(self, conn: sqlite3.Connection) -> None:
+        pass
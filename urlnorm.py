@@ -0,0 +1,86 @@
+# urlnorm.py
+import hashlib
+import os
+import re
+from functools import lru_cache
+from urllib.parse import parse_qs, urlencode, urlparse
+
+# -------------------------
+# URL canónica (para dedupe y como clave de los stores)
+# -------------------------
+#
+# canonical_url corre sobre cada anchor de cada listado y cada link de cada SERP, y los
+# mismos links vuelven refresh tras refresh. Acá:
+#
+# - memo LRU acotado (URLNORM_CACHE_SIZE entradas): un link ya visto no vuelve a pasar
+#   por urlparse/parse_qs/urlencode (ni por el hash de url_key);
+# - camino rápido para URLs http(s) sin query ni fragmento (la mayoría de los avisos):
+#   el resultado es la URL tal cual, sin parsear nada;
+# - url_key: clave de 64 bits del link ya canónico, para sets/dicts de dedupe en vez
+#   de guardar el string completo.
+#
+# La salida es EXACTAMENTE la de la versión anterior (bench/bench_urlnorm.py lo
+# verifica), incluido que de un parámetro repetido sólo queda el primer valor.
+
+TRACKING_PARAMS = frozenset({
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "gclid", "fbclid", "ref", "refsrc",
+})
+CACHE_SIZE = int(os.getenv("URLNORM_CACHE_SIZE", "65536"))
+
+# Lo que urlparse/geturl podría reescribir: query y fragmento, ";" (un ";" final sin
+# params se pierde), "[" / "]" (IPv6, se valida), espacios/controles (urlsplit los bota)
+# y no-ASCII (el netloc se valida con NFKC). Una URL con alguno va por el camino largo.
+_NO_TRIVIAL = re.compile(r"[\x00-\x20?#;\[\]\x7f-\U0010ffff]")
+
+
+def _es_trivial(url: str) -> bool:
+    """
+    http(s) en minúscula, con host (sin host, un path "//..." se colapsa) y nada que
+    urlparse reescriba: canonical_url(url) == url.
+    """
+    if url.startswith("https://"):
+        host = 8
+    elif url.startswith("http://"):
+        host = 7
+    else:
+        return False
+    return url[host:host + 1] not in ("", "/") and _NO_TRIVIAL.search(url) is None
+
+
+def _normalizar(url: str) -> str:
+    if "/url?q=" in url:
+        url = url.split("/url?q=")[1].split("&")[0]
+
+    parts = urlparse(url)
+    q = parse_qs(parts.query, keep_blank_values=False)
+
+    for k in list(q.keys()):
+        if k.lower() in TRACKING_PARAMS:
+            q.pop(k, None)
+
+    new_query = urlencode({k: v[0] for k, v in q.items()})
+    return parts._replace(query=new_query, fragment="").geturl()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def canonical_url(url: str) -> str:
+    """
+    Limpia redirecciones típicas de Google (/url?q=...) y trackers comunes para dedupe.
+    """
+    if not url or _es_trivial(url):
+        return url
+    return _normalizar(url)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def url_key(url: str) -> int:
+    """
+    Clave de 64 bits (blake2b) de un link YA canónico, o de cualquier clave de aviso.
+    Con miles de avisos la probabilidad de choque es del orden de 1e-12.
+    """
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def cache_clear() -> None:
+    canonical_url.cache_clear()
+    url_key.cache_clear()